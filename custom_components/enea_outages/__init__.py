@@ -3,54 +3,110 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
-
-from enea_outages.client import EneaOutagesClient
+from datetime import datetime
 from functools import partial
-from enea_outages.models import Outage, OutageType
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-
-from .const import DOMAIN, CONF_REGION, DEFAULT_PLANNED_SCAN_INTERVAL, DEFAULT_UNPLANNED_SCAN_INTERVAL, PLATFORMS
 
+import voluptuous as vol
+from enea_outages.models import OutageType
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    CONF_REGION,
+    CONF_STREET,
+    CONF_PROXIMITY,
+    CONF_CACHE_DIR,
+    CONF_LOCATIONS,
+    CONF_MAX_QUEUE,
+    CONF_MAX_WORKERS,
+    PLATFORMS,
+    DATA_CACHE,
+    DATA_OCCUPANCY,
+    DATA_PROFILER,
+    ATTR_REGIONS,
+    ATTR_OUTAGE_TYPES,
+    ATTR_CYCLES,
+    ATTR_BUDGET_MS,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_DURATION,
+    ATTR_NEXT_OUTAGE_END,
+    ATTR_NEXT_OUTAGE_START,
+    ATTR_START,
+    DEFAULT_EXECUTOR_MAX_QUEUE,
+    DEFAULT_EXECUTOR_MAX_WORKERS,
+    DEFAULT_PROFILE_CYCLES,
+    DEFAULT_PROFILE_BUDGET_MS,
+)
+from .cache import SharedFetchCache
+from .coordinator import async_get_gazetteer, async_get_registry
+from .entity import entry_addresses, entry_proximity
+from .executor import async_setup_executor
+from .occupancy import async_track_occupancy
+from .profiler import UpdateProfiler
+from .provisioning import async_import_locations
+from . import websocket_api
 
 _LOGGER = logging.getLogger(__name__)
 
-# This is a dict of dictionaries of coordinators per region and outage type to cache the data
-# Key: region name (str)
-# Value: dict[OutageType, DataUpdateCoordinator]
-COORDINATORS: dict[str, dict[OutageType, DataUpdateCoordinator]] = {}
-
-
-class EneaOutagesOutageTypeCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching Enea Outages data for a specific outage type."""
-
-    def __init__(self, hass: HomeAssistant, region: str, outage_type: OutageType) -> None:
-        """Initialize."""
-        self.region = region
-        self.outage_type = outage_type
-        update_interval = (
-            DEFAULT_PLANNED_SCAN_INTERVAL if outage_type == OutageType.PLANNED else DEFAULT_UNPLANNED_SCAN_INTERVAL
-        )
-        super().__init__(
-            hass,
-            _LOGGER,
-            name=f"{DOMAIN}_{region}_{outage_type.value}",
-            update_interval=timedelta(seconds=update_interval),
+LOCATION_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_REGION): cv.string,
+        vol.Optional(CONF_STREET, default=""): cv.string,
+    }
+)
+
+CONFIG_SCHEMA = vol.Schema(
+    {
+        vol.Optional(DOMAIN): vol.Schema(
+            {
+                vol.Optional(CONF_MAX_WORKERS, default=DEFAULT_EXECUTOR_MAX_WORKERS): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=16)
+                ),
+                vol.Optional(CONF_MAX_QUEUE, default=DEFAULT_EXECUTOR_MAX_QUEUE): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)
+                ),
+                vol.Optional(CONF_CACHE_DIR): cv.string,
+                vol.Optional(CONF_LOCATIONS, default=[]): vol.All(cv.ensure_list, [LOCATION_SCHEMA]),
+            }
         )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_REGIONS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_OUTAGE_TYPES): vol.All(cv.ensure_list, [vol.In(["planned", "unplanned"])]),
+        vol.Optional(ATTR_CYCLES, default=DEFAULT_PROFILE_CYCLES): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+        vol.Optional(ATTR_BUDGET_MS, default=DEFAULT_PROFILE_BUDGET_MS): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
 
-    async def _async_update_data(self) -> list[Outage]:
-        """Fetch data from Enea API for the specific outage type."""
-        try:
-            client = EneaOutagesClient()
-            return await self.hass.async_add_executor_job(
-                partial(client.get_outages_for_region, region=self.region, outage_type=self.outage_type)
-            )
-        except Exception as err:
-            raise UpdateFailed(
-                f"Error communicating with Enea API for {self.outage_type.name} in {self.region}: {err}"
-            ) from err
+CHECK_WINDOW_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Required(ATTR_DURATION): vol.All(cv.time_period, cv.positive_timedelta),
+    }
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Enea Outages integration."""
+    if DOMAIN in config:
+        async_setup_executor(hass, config[DOMAIN][CONF_MAX_WORKERS], config[DOMAIN][CONF_MAX_QUEUE])
+        # Instances sharing a cache directory fetch each region once per interval between them
+        if CONF_CACHE_DIR in config[DOMAIN]:
+            hass.data[DATA_CACHE] = SharedFetchCache(hass, config[DOMAIN][CONF_CACHE_DIR])
+        if config[DOMAIN][CONF_LOCATIONS]:
+            hass.async_create_task(async_import_locations(hass, config[DOMAIN][CONF_LOCATIONS]))
+    websocket_api.async_setup(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -58,63 +114,119 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data.setdefault(DOMAIN, {})
 
     region = entry.data[CONF_REGION]
-
-    if region not in COORDINATORS:
-        COORDINATORS[region] = {}
-
-    # Setup Planned Outages Coordinator
-    if OutageType.PLANNED not in COORDINATORS[region]:
-        planned_coordinator = EneaOutagesOutageTypeCoordinator(hass, region, OutageType.PLANNED)
-        await planned_coordinator.async_config_entry_first_refresh()
-        COORDINATORS[region][OutageType.PLANNED] = planned_coordinator
-    else:
-        planned_coordinator = COORDINATORS[region][OutageType.PLANNED]
-
-    # Setup Unplanned Outages Coordinator
-    if OutageType.UNPLANNED not in COORDINATORS[region]:
-        unplanned_coordinator = EneaOutagesOutageTypeCoordinator(hass, region, OutageType.UNPLANNED)
-        await unplanned_coordinator.async_config_entry_first_refresh()
-        COORDINATORS[region][OutageType.UNPLANNED] = unplanned_coordinator
-    else:
-        unplanned_coordinator = COORDINATORS[region][OutageType.UNPLANNED]
+    registry = async_get_registry(hass)
+
+    # Coordinators are shared by all entries of a region and reused while still warm
+    planned_coordinator = await registry.async_acquire(region, OutageType.PLANNED)
+    try:
+        unplanned_coordinator = await registry.async_acquire(region, OutageType.UNPLANNED)
+    except Exception:
+        registry.async_release(planned_coordinator)
+        raise
+
+    addresses = entry_addresses(entry)
+    for coordinator in (planned_coordinator, unplanned_coordinator):
+        coordinator.matcher.register(addresses, coordinator.data)
+        entry.async_on_unload(partial(coordinator.matcher.unregister, addresses))
+
+    # Proximity mode places outages on the map with the offline gazetteer
+    if entry.options.get(CONF_PROXIMITY):
+        gazetteer = await async_get_gazetteer(hass)
+        planned_coordinator.gazetteer = gazetteer
+        unplanned_coordinator.gazetteer = gazetteer
 
     hass.data[DOMAIN][entry.entry_id] = {
         OutageType.PLANNED: planned_coordinator,
         OutageType.UNPLANNED: unplanned_coordinator,
     }
 
+    # Minute occupancy of the entry's outages, for time window queries
+    hass.data.setdefault(DATA_OCCUPANCY, {})[entry.entry_id] = async_track_occupancy(
+        entry, [planned_coordinator, unplanned_coordinator], addresses, entry_proximity(hass, entry)
+    )
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     # Register the service for manual refresh
     async def handle_update_all_coordinators(call):
-        for region_coords in COORDINATORS.values():
-            for coordinator in region_coords.values():
-                await coordinator.async_request_refresh()
+        for coordinator in async_get_registry(hass).coordinators:
+            await coordinator.async_request_refresh()
 
     hass.services.async_register(DOMAIN, "update", handle_update_all_coordinators)
 
+    # Register the service profiling the next update cycles
+    async def handle_profile(call: ServiceCall) -> None:
+        regions = call.data.get(ATTR_REGIONS)
+        outage_types = call.data.get(ATTR_OUTAGE_TYPES)
+        coordinators = [
+            coordinator
+            for coordinator in async_get_registry(hass).coordinators
+            if (not regions or coordinator.region in regions)
+            and (not outage_types or coordinator.outage_type.name.lower() in outage_types)
+        ]
+        if not coordinators:
+            raise ServiceValidationError("No Enea Outages coordinators match the selection")
+        if DATA_PROFILER in hass.data:
+            # One profile at a time, they share the state writer and tracemalloc
+            raise ServiceValidationError("An Enea Outages profile is already running, wait for its report")
+        UpdateProfiler(hass, coordinators, call.data[ATTR_CYCLES], call.data[ATTR_BUDGET_MS] / 1000).async_start()
+
+    hass.services.async_register(DOMAIN, "profile", handle_profile, schema=PROFILE_SCHEMA)
+
+    # Register the service checking a time window for outages
+    async def handle_check_window(call: ServiceCall) -> ServiceResponse:
+        if (occupancy := hass.data[DATA_OCCUPANCY].get(call.data[ATTR_CONFIG_ENTRY_ID])) is None:
+            raise ServiceValidationError("Enea Outages config entry not loaded")
+        # Outage times are naive local times, like those of the datetime selector
+        start = call.data.get(ATTR_START) or datetime.now()
+        if start.tzinfo is not None:
+            start = dt_util.as_local(start).replace(tzinfo=None)
+        end = start + call.data[ATTR_DURATION]
+        if not occupancy.covers(start, end):
+            # Outages past the map are not rasterized, so the answer would silently be "no outage"
+            raise ServiceValidationError(
+                f"Window {start.isoformat()} - {end.isoformat()} is outside the {occupancy.minutes // 1440} day "
+                "outage map of the entry"
+            )
+        busy = occupancy.busy_minutes(start, end)
+        next_outage = occupancy.next_outage(start)
+        return {
+            "outage": busy > 0,
+            "outage_minutes": busy,
+            ATTR_NEXT_OUTAGE_START: next_outage[0].isoformat() if next_outage else None,
+            ATTR_NEXT_OUTAGE_END: next_outage[1].isoformat() if next_outage else None,
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        "check_window",
+        handle_check_window,
+        schema=CHECK_WINDOW_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        region = entry.data[CONF_REGION]
-        hass.data[DOMAIN].pop(entry.entry_id)
-
-        # Check if any other entries are still using this region's planned coordinator
-        if not any(entry_coords[OutageType.PLANNED].region == region for entry_coords in hass.data[DOMAIN].values()):
-            COORDINATORS[region].pop(OutageType.PLANNED)
-
-        # Check if any other entries are still using this region's unplanned coordinator
-        if not any(entry_coords[OutageType.UNPLANNED].region == region for entry_coords in hass.data[DOMAIN].values()):
-            COORDINATORS[region].pop(OutageType.UNPLANNED)
-
-        if not COORDINATORS[region]:  # If both planned and unplanned are gone, remove the region key
-            COORDINATORS.pop(region)
+        registry = async_get_registry(hass)
+        hass.data[DATA_OCCUPANCY].pop(entry.entry_id)
+        for coordinator in hass.data[DOMAIN].pop(entry.entry_id).values():
+            registry.async_release(coordinator)
 
     # If all config entries are unloaded, unregister the service
     if not hass.data[DOMAIN]:
         hass.services.async_remove(DOMAIN, "update")
+        hass.services.async_remove(DOMAIN, "profile")
+        hass.services.async_remove(DOMAIN, "check_window")
 
     return unload_ok
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
@@ -0,0 +1,36 @@
+"""Region-wide figures computed once per coordinator update."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from enea_outages.models import Outage
+
+from .streets import street_names
+
+
+@dataclass(frozen=True)
+class RegionSummary:
+    """Figures over all outages of a region and outage type."""
+
+    count: int = 0
+    streets: tuple[str, ...] = field(default=())
+    next_start: datetime | None = None
+    latest_end: datetime | None = None
+
+
+def summarize(outages: list[Outage], now: datetime) -> RegionSummary:
+    """Return the summary of a snapshot of outages.
+
+    The next start is the earliest start still ahead of now, the latest end
+    the last time power is expected back.
+    """
+    starts = [outage.start_time for outage in outages if outage.start_time is not None and outage.start_time > now]
+    ends = [outage.end_time for outage in outages if outage.end_time is not None]
+    return RegionSummary(
+        count=len(outages),
+        streets=tuple(sorted(street_names(outages))),
+        next_start=min(starts, default=None),
+        latest_end=max(ends, default=None),
+    )
@@ -4,8 +4,9 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime
+from typing import Any
 
-from enea_outages.models import Outage, OutageType
+from enea_outages.models import OutageType
 from homeassistant.components.binary_sensor import (
     BinarySensorEntity,
     BinarySensorEntityDescription,
@@ -15,8 +16,27 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-
-from .const import DOMAIN, CONF_REGION, CONF_STREET
+from homeassistant.util import slugify
+
+from .const import (
+    DOMAIN,
+    CONF_REGION,
+    DATA_OCCUPANCY,
+    ATTR_DATA_AGE,
+    ATTR_NEXT_OUTAGE_END,
+    ATTR_NEXT_OUTAGE_START,
+    ATTR_STALE,
+)
+from .entity import (
+    address_device_info,
+    async_track_matched_addresses,
+    entry_addresses,
+    entry_device_info,
+    entry_proximity,
+)
+from .evaluation import is_active
+from .fanout import async_get_state_writer
+from .occupancy import OccupancyMap
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,7 +48,8 @@ async def async_setup_entry(
 ) -> None:
     """Set up the binary_sensor platform."""
 
-    street = config_entry.data.get(CONF_STREET)
+    addresses = entry_addresses(config_entry)
+    near = entry_proximity(hass, config_entry)
 
     # Get the dictionary of coordinators for this entry
     entry_coordinators = hass.data[DOMAIN][config_entry.entry_id]
@@ -48,17 +69,41 @@ async def async_setup_entry(
                 translation_key="outage_active",
                 icon="mdi:power-plug-off",
             ),
-            street,
+            addresses,
+            near,
+            occupancy=hass.data[DATA_OCCUPANCY][config_entry.entry_id],
         )
     )
 
     async_add_entities(entities)
 
+    def _entities_for_address(address: str) -> list[BinarySensorEntity]:
+        """Create the per-address outage active binary sensor."""
+        return [
+            EneaOutagesActiveBinarySensor(
+                planned_coordinator,
+                unplanned_coordinator,
+                config_entry,
+                BinarySensorEntityDescription(
+                    key=f"{config_entry.entry_id}_{slugify(address)}_outage_active",
+                    translation_key="outage_active",
+                    icon="mdi:power-plug-off",
+                ),
+                [address],
+                device_info=address_device_info(config_entry, address),
+            )
+        ]
+
+    async_track_matched_addresses(
+        config_entry, [planned_coordinator, unplanned_coordinator], async_add_entities, _entities_for_address
+    )
+
 
 class EneaOutagesActiveBinarySensor(CoordinatorEntity, BinarySensorEntity):
     """Binary sensor to indicate if any outage is currently active."""
 
     _attr_has_entity_name = True
+    _profiled_properties = ("is_on", "extra_state_attributes")
 
     def __init__(
         self,
@@ -66,56 +111,63 @@ class EneaOutagesActiveBinarySensor(CoordinatorEntity, BinarySensorEntity):
         unplanned_coordinator,
         config_entry: ConfigEntry,
         entity_description: BinarySensorEntityDescription,
-        street: str | None,
+        addresses: list[str],
+        near: tuple[float, float, float] | None = None,
+        device_info: DeviceInfo | None = None,
+        occupancy: OccupancyMap | None = None,
     ) -> None:
         """Initialize the binary sensor."""
         super().__init__(planned_coordinator)  # Subscribe to planned coordinator for updates
         self._unplanned_coordinator = unplanned_coordinator  # Keep a reference to the unplanned coordinator
         self.entity_description = entity_description
         self._config_entry = config_entry
-        self._street = street
+        self._addresses = addresses
+        self._near = near
+        self._occupancy = occupancy
         self._region = config_entry.data[CONF_REGION]
 
         self._attr_unique_id = f"{config_entry.entry_id}_{entity_description.key}"
 
-        device_name = f"Enea Outages ({self._region}{' - ' + self._street if self._street else ''})"
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, config_entry.entry_id)},
-            name=device_name,
-            model="Enea Outages Monitor",
-            manufacturer="Enea Operator",
-        )
+        # The address list stays out of the name, it changes with the options and can grow long
+        self._attr_device_info = device_info or entry_device_info(config_entry)
 
     @property
     def is_on(self) -> bool | None:
         """Return true if the binary sensor is on."""
-        now = datetime.now()
-
-        # Check planned outages
-        planned_outages = self._filter_outages(self.coordinator.data)
-        for outage in planned_outages:
-            if outage.start_time and outage.end_time and outage.start_time <= now <= outage.end_time:
-                return True
-
-        # Check unplanned outages
-        unplanned_outages = self._filter_outages(self._unplanned_coordinator.data)
-        for outage in unplanned_outages:
-            # Unplanned outages typically only have an end_time. Assume they are active if end_time is in the future.
-            if outage.end_time and now <= outage.end_time:
-                return True
-
-        return False
+        return is_active(
+            self.coordinator.outages_for(self._addresses, self._near),
+            self._unplanned_coordinator.outages_for(self._addresses, self._near),
+            datetime.now(),
+        )
 
-    def _filter_outages(self, all_outages: list[Outage]) -> list[Outage]:
-        """Filter outages by street if provided."""
-        if self._street:
-            return [o for o in all_outages if self._street.lower() in o.description.lower()]
-        return all_outages
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        planned = self.coordinator.freshness_attributes
+        unplanned = self._unplanned_coordinator.freshness_attributes
+        ages = [age for age in (planned[ATTR_DATA_AGE], unplanned[ATTR_DATA_AGE]) if age is not None]
+        attrs = {
+            ATTR_DATA_AGE: max(ages) if ages else None,
+            ATTR_STALE: planned[ATTR_STALE] or unplanned[ATTR_STALE],
+        }
+        if self._occupancy is not None:
+            next_outage = self._occupancy.next_outage(datetime.now())
+            attrs[ATTR_NEXT_OUTAGE_START] = next_outage[0].isoformat() if next_outage else None
+            attrs[ATTR_NEXT_OUTAGE_END] = next_outage[1].isoformat() if next_outage else None
+        return attrs
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the planned coordinator."""
-        self.async_write_ha_state()
+        if (profiler := self.coordinator.profiler or self._unplanned_coordinator.profiler) is not None:
+            profiler.time_getters(self, self._profiled_properties)
+        # Write once per tick, however many coordinators dirtied the entity
+        async_get_state_writer(self.hass).async_schedule(self)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """When entity will be removed from hass."""
+        await super().async_will_remove_from_hass()
+        async_get_state_writer(self.hass).async_discard(self)
 
     async def async_added_to_hass(self) -> None:
         """When entity is added to hass."""
@@ -0,0 +1,238 @@
+"""Fetch cache shared by several Home Assistant instances on one host."""
+
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from enea_outages.models import Outage, OutageType
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import slugify
+
+from .const import DEFAULT_CACHE_LEASE_TTL, DEFAULT_CACHE_WAIT
+
+# Magic, format version, snapshot version, fetched at, attempted at, payload length
+HEADER = struct.Struct("<4sHQddI")
+MAGIC = b"ENEA"
+FORMAT_VERSION = 1
+
+CACHE_POLL_INTERVAL = 1.0
+
+
+class CachedFetchError(HomeAssistantError):
+    """Error raised when the instance holding the lease failed to fetch."""
+
+
+@dataclass
+class Snapshot:
+    """Outages fetched by one of the instances, with when they were fetched."""
+
+    version: int
+    fetched_at: float
+    attempted_at: float
+    outages: list[Outage]
+    error: str | None = None
+
+
+def _encode(outages: list[Outage]) -> list[list[str | None]]:
+    """Serialize outages to rows of the snapshot payload."""
+    return [
+        [
+            outage.region,
+            outage.description,
+            outage.start_time.isoformat() if outage.start_time else None,
+            outage.end_time.isoformat() if outage.end_time else None,
+        ]
+        for outage in outages
+    ]
+
+
+def _decode(rows: list[list[str | None]]) -> list[Outage]:
+    """Deserialize outages from rows of the snapshot payload."""
+    return [
+        Outage(
+            region=region,
+            description=description,
+            start_time=datetime.fromisoformat(start) if start else None,
+            end_time=datetime.fromisoformat(end) if end else None,
+        )
+        for region, description, start, end in rows
+    ]
+
+
+class SharedFetchCache:
+    """Let one instance per host fetch each region and outage type per interval.
+
+    Instances take an expiring lease on a lock file before fetching, so a
+    crashed owner is replaced once its lease runs out. The owner writes the
+    outages to a versioned snapshot file, replaced atomically, which the other
+    instances read through mmap and only parse again when its version changed.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        directory: str,
+        lease_ttl: float = DEFAULT_CACHE_LEASE_TTL,
+        wait: float = DEFAULT_CACHE_WAIT,
+    ) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self.directory = Path(directory)
+        self.lease_ttl = lease_ttl
+        self.wait = wait
+        self.owner = uuid.uuid4().hex
+        self._parsed: dict[Path, Snapshot] = {}
+
+    def _path(self, region: str, outage_type: OutageType, suffix: str) -> Path:
+        """Return the path of a cache file for a region and outage type."""
+        return self.directory / f"{slugify(region)}_{outage_type.value}.{suffix}"
+
+    async def async_fetch(
+        self,
+        region: str,
+        outage_type: OutageType,
+        max_age: timedelta,
+        fetch: Callable[[], Awaitable[list[Outage]]],
+    ) -> list[Outage]:
+        """Return outages fetched by this or another instance within max_age."""
+        snapshot_path = self._path(region, outage_type, "snapshot")
+        lease_path = self._path(region, outage_type, "lease")
+        deadline = time.time() + self.wait
+
+        def _fresh(snapshot: Snapshot | None) -> bool:
+            return snapshot is not None and time.time() - snapshot.attempted_at < max_age.total_seconds()
+
+        while True:
+            snapshot = await self.hass.async_add_executor_job(self._read, snapshot_path)
+            if not _fresh(snapshot) and await self.hass.async_add_executor_job(self._acquire, lease_path):
+                try:
+                    # The previous owner may have written a snapshot since it was read
+                    snapshot = await self.hass.async_add_executor_job(self._read, snapshot_path)
+                    if not _fresh(snapshot):
+                        return await self._async_fetch_and_write(snapshot_path, snapshot, fetch)
+                finally:
+                    await self.hass.async_add_executor_job(self._release, lease_path)
+            if _fresh(snapshot):
+                return self._outages(snapshot)
+
+            # Another instance is fetching, serve its previous snapshot or wait for the first one
+            if snapshot is not None and snapshot.error is None:
+                return snapshot.outages
+            if time.time() >= deadline:
+                return await fetch()
+            await asyncio.sleep(CACHE_POLL_INTERVAL)
+
+    async def _async_fetch_and_write(
+        self, path: Path, previous: Snapshot | None, fetch: Callable[[], Awaitable[list[Outage]]]
+    ) -> list[Outage]:
+        """Fetch upstream while holding the lease and publish the result."""
+        try:
+            outages = await fetch()
+        except Exception as err:
+            # Record the failure so the others do not retry upstream within the interval
+            await self.hass.async_add_executor_job(self._write, path, previous, None, str(err))
+            raise
+        await self.hass.async_add_executor_job(self._write, path, previous, outages, None)
+        return outages
+
+    @staticmethod
+    def _outages(snapshot: Snapshot) -> list[Outage]:
+        """Return the outages of a snapshot, raising the error of a failed attempt."""
+        if snapshot.error is not None:
+            raise CachedFetchError(snapshot.error)
+        return snapshot.outages
+
+    def _read(self, path: Path) -> Snapshot | None:
+        """Read a snapshot, parsing the payload only if its version changed."""
+        try:
+            with path.open("rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                magic, format_version, version, fetched_at, attempted_at, length = HEADER.unpack_from(mapped)
+                if magic != MAGIC or format_version != FORMAT_VERSION:
+                    return None
+                cached = self._parsed.get(path)
+                if cached is not None and cached.version == version:
+                    return cached
+                payload = json.loads(mapped[HEADER.size : HEADER.size + length])
+        except (FileNotFoundError, ValueError, struct.error):
+            return None
+
+        snapshot = Snapshot(version, fetched_at, attempted_at, _decode(payload["outages"]), payload["error"])
+        self._parsed[path] = snapshot
+        return snapshot
+
+    def _version(self, path: Path) -> int:
+        """Return the version of the snapshot on disk, 0 if there is none."""
+        try:
+            with path.open("rb") as file:
+                magic, format_version, version, *_ = HEADER.unpack(file.read(HEADER.size))
+        except (FileNotFoundError, struct.error):
+            return 0
+        return version if magic == MAGIC and format_version == FORMAT_VERSION else 0
+
+    def _write(self, path: Path, previous: Snapshot | None, outages: list[Outage] | None, error: str | None) -> None:
+        """Atomically replace a snapshot with new outages, or record a failed attempt."""
+        now = time.time()
+        version = self._version(path) + 1
+        if outages is None:
+            outages = previous.outages if previous is not None else []
+            fetched_at = previous.fetched_at if previous is not None else 0.0
+        else:
+            fetched_at = now
+        payload = json.dumps({"outages": _encode(outages), "error": error}, ensure_ascii=False).encode()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(HEADER.pack(MAGIC, FORMAT_VERSION, version, fetched_at, now, len(payload)))
+                file.write(payload)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _acquire(self, path: Path) -> bool:
+        """Take the lease on a region and outage type unless another instance holds it."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with path.open("a+", encoding="utf-8") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            file.seek(0)
+            try:
+                lease = json.loads(file.read() or "{}")
+            except ValueError:
+                lease = {}
+            if lease.get("owner") not in (None, self.owner) and lease.get("expires", 0) > time.time():
+                return False
+            file.seek(0)
+            file.truncate()
+            json.dump({"owner": self.owner, "expires": time.time() + self.lease_ttl}, file)
+            file.flush()
+            return True
+
+    def _release(self, path: Path) -> None:
+        """Give up the lease if this instance still holds it."""
+        with path.open("a+", encoding="utf-8") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            file.seek(0)
+            try:
+                lease = json.loads(file.read() or "{}")
+            except ValueError:
+                lease = {}
+            if lease.get("owner") == self.owner:
+                file.seek(0)
+                file.truncate()
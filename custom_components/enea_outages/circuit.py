@@ -0,0 +1,64 @@
+"""Circuit breaker guarding the Enea API for a region."""
+
+from __future__ import annotations
+
+import time
+
+from .const import (
+    DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+    DEFAULT_CIRCUIT_MAX_PROBE_INTERVAL,
+    DEFAULT_CIRCUIT_PROBE_INTERVAL,
+)
+
+
+class CircuitBreaker:
+    """Track consecutive upstream failures and throttle requests while they last.
+
+    The circuit opens after `failure_threshold` consecutive failures. While it is
+    open only one probe is let through per probe interval, which doubles after
+    every failed probe up to `max_probe_interval`. A successful request closes it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+        probe_interval: float = DEFAULT_CIRCUIT_PROBE_INTERVAL,
+        max_probe_interval: float = DEFAULT_CIRCUIT_MAX_PROBE_INTERVAL,
+    ) -> None:
+        """Initialize the circuit breaker."""
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.max_probe_interval = max_probe_interval
+        self.failures = 0
+        self._current_probe_interval = probe_interval
+        self._next_probe: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        """Return whether requests are currently being held back."""
+        return self._next_probe is not None
+
+    def allow_request(self) -> bool:
+        """Return whether a request may go upstream now."""
+        if self._next_probe is None:
+            return True
+        if time.monotonic() >= self._next_probe:
+            # Let this probe through and hold back others until it reports back
+            self._next_probe = time.monotonic() + self._current_probe_interval
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful request."""
+        self.failures = 0
+        self._current_probe_interval = self.probe_interval
+        self._next_probe = None
+
+    def record_failure(self) -> None:
+        """Count a failed request, opening the circuit or backing off the probes."""
+        self.failures += 1
+        if self._next_probe is not None:
+            self._current_probe_interval = min(self._current_probe_interval * 2, self.max_probe_interval)
+        elif self.failures < self.failure_threshold:
+            return
+        self._next_probe = time.monotonic() + self._current_probe_interval
@@ -8,55 +8,233 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.selector import (
+    NumberSelector,
+    NumberSelectorConfig,
+    NumberSelectorMode,
+    SelectSelector,
+    SelectSelectorConfig,
+    SelectSelectorMode,
+)
 
 from enea_outages.client import EneaOutagesClient
-from .const import DOMAIN, CONF_REGION, CONF_STREET, DEFAULT_REGION
+from enea_outages.models import OutageType
+from .const import (
+    DOMAIN,
+    CONF_ADDRESS_ENTITIES,
+    CONF_PROXIMITY,
+    CONF_RADIUS,
+    CONF_REGION,
+    CONF_REGION_ENTITIES,
+    CONF_STREET,
+    CONF_STREETS,
+    DEFAULT_RADIUS,
+    DEFAULT_REGION,
+    MAX_STREET_SUGGESTIONS,
+)
+from .coordinator import async_get_registry
+from .entity import entry_addresses, entry_title
+from .executor import async_get_executor
+from .matching import normalize_address
+from .streets import StreetIndex, build_street_index
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@callback
+def _async_street_index(hass: HomeAssistant, region: str) -> tuple[StreetIndex, bool]:
+    """Return the street index of a region and whether it holds cached outage data to check against.
+
+    The index is built from the data of live coordinators, already in
+    memory, so it never fetches from Enea.
+    """
+    registry = async_get_registry(hass)
+    outage_lists = [
+        coordinator.data
+        for outage_type in (OutageType.PLANNED, OutageType.UNPLANNED)
+        if (coordinator := registry.get(region, outage_type)) is not None and coordinator.data
+    ]
+    return build_street_index(outage_lists), bool(outage_lists)
+
+
+def _street_selector(index: StreetIndex, multiple: bool = False) -> SelectSelector:
+    """Return a selector suggesting indexed names while accepting any street."""
+    return SelectSelector(
+        SelectSelectorConfig(
+            options=index.complete(limit=MAX_STREET_SUGGESTIONS),
+            multiple=multiple,
+            custom_value=True,
+            mode=SelectSelectorMode.DROPDOWN,
+        )
+    )
+
+
+def _unique_id(region: str, street: str | None) -> str:
+    """Return the unique ID of the entry for a region and street."""
+    unique_id = f"{region}"
+    if street:
+        unique_id += f"_{street.replace(' ', '_')}"
+    return unique_id
+
+
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Enea Outages."""
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._unconfirmed_street: str | None = None
+        self._available_regions: list[str] | None = None
+        self._region: str | None = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> FlowResult:
-        """Handle the initial step."""
+        """Handle the choice of the region."""
+        errors: dict[str, str] = {}
+        if self._available_regions is None:
+            # Fetch the catalogue once per flow, not again when the form is submitted
+            try:
+                client = EneaOutagesClient()
+                self._available_regions = await async_get_executor(self.hass).async_run(
+                    client.get_available_regions, sheddable=False
+                )
+            except Exception as e:
+                _LOGGER.error("Failed to get available regions: %s", e)
+                errors["base"] = "cannot_connect"
+        available_regions = self._available_regions or []
+
+        if user_input is not None and not errors:
+            if user_input[CONF_REGION] in available_regions:
+                self._region = user_input[CONF_REGION]
+                return await self.async_step_street()
+            errors["base"] = "invalid_region"
+
+        data_schema = vol.Schema(
+            {
+                vol.Required(CONF_REGION, default=self._region or DEFAULT_REGION): vol.In(available_regions),
+            }
+        )
+        return self.async_show_form(step_id="user", data_schema=data_schema, errors=errors)
+
+    async def async_step_street(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Handle the optional street, suggesting those of the chosen region."""
         errors: dict[str, str] = {}
-        available_regions = []
-        try:
-            client = EneaOutagesClient()
-            available_regions = await self.hass.async_add_executor_job(client.get_available_regions)
-        except Exception as e:
-            _LOGGER.error("Failed to get available regions: %s", e)
-            errors["base"] = "cannot_connect"
+        region = self._region
+        index, checkable = _async_street_index(self.hass, region)
 
         if user_input is not None:
-            region = user_input[CONF_REGION]
             street = user_input.get(CONF_STREET)
 
-            # Generate a unique ID for the config entry based on region and street
-            unique_id = f"{region}"
-            if street:
-                unique_id += f"_{street.replace(' ', '_')}"
-            await self.async_set_unique_id(unique_id)
+            await self.async_set_unique_id(_unique_id(region, street))
             self._abort_if_unique_id_configured()
 
-            if not errors and region not in available_regions:
-                errors["base"] = "invalid_region"
+            if street:
+                # A street missing from the cached outages may be a typo, submitting it again keeps it
+                if index.has_house_number(street):
+                    # Descriptions list house numbers apart from the street, so this would never match
+                    errors[CONF_STREET] = "house_number"
+                elif checkable and not index.knows(street) and self._unconfirmed_street != street:
+                    self._unconfirmed_street = street
+                    errors[CONF_STREET] = "unknown_street"
 
             if not errors:
-                title = region
-                if street:
-                    title += f", {street}"
-                return self.async_create_entry(title=title, data=user_input)
+                return self.async_create_entry(
+                    title=entry_title(region, street), data={CONF_REGION: region, CONF_STREET: street or ""}
+                )
 
         data_schema = vol.Schema(
             {
-                vol.Required(CONF_REGION, default=DEFAULT_REGION): vol.In(available_regions),
-                vol.Optional(CONF_STREET): str,
+                vol.Optional(CONF_STREET, **self._suggested_street(user_input)): _street_selector(index),
             }
         )
+        return self.async_show_form(
+            step_id="street", data_schema=data_schema, errors=errors, description_placeholders={"region": region}
+        )
 
-        return self.async_show_form(step_id="user", data_schema=data_schema, errors=errors)
+    async def async_step_import(self, import_data: dict[str, Any]) -> FlowResult:
+        """Create an entry for a location from configuration.yaml, already checked against the catalogue."""
+        region = import_data[CONF_REGION]
+        street = import_data.get(CONF_STREET)
+        await self.async_set_unique_id(_unique_id(region, street))
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(title=entry_title(region, street), data=import_data)
+
+    @staticmethod
+    def _suggested_street(user_input: dict[str, Any] | None) -> dict[str, Any]:
+        """Return the marker arguments keeping the entered street when the form is shown again."""
+        if user_input and user_input.get(CONF_STREET):
+            return {"description": {"suggested_value": user_input[CONF_STREET]}}
+        return {}
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the list of addresses watched by an Enea Outages entry."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self.config_entry = config_entry
+        self._unconfirmed_streets: set[str] = set()
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Manage the watched addresses."""
+        errors: dict[str, str] = {}
+        index, checkable = _async_street_index(self.hass, self.config_entry.data[CONF_REGION])
+        if user_input is not None:
+            streets = []
+            # Streets differing only in case or spacing match the same outages and would share unique IDs
+            keys = set()
+            for street in user_input.get(CONF_STREETS, []):
+                street = street.strip()
+                if street and (key := normalize_address(street)) not in keys:
+                    keys.add(key)
+                    streets.append(street)
+
+            # Streets missing from the cached outages may be typos, submitting them again keeps them
+            unknown = {street for street in streets if checkable and not index.knows(street)}
+            if any(index.has_house_number(street) for street in streets):
+                # Descriptions list house numbers apart from the street, so these would never match
+                errors[CONF_STREETS] = "house_number"
+            elif unknown - self._unconfirmed_streets:
+                self._unconfirmed_streets |= unknown
+                errors[CONF_STREETS] = "unknown_street"
+
+        if user_input is not None and not errors:
+            return self.async_create_entry(
+                title="",
+                data={
+                    CONF_STREETS: streets,
+                    CONF_ADDRESS_ENTITIES: user_input.get(CONF_ADDRESS_ENTITIES, False),
+                    CONF_PROXIMITY: user_input.get(CONF_PROXIMITY, False),
+                    CONF_RADIUS: user_input.get(CONF_RADIUS, DEFAULT_RADIUS),
+                    CONF_REGION_ENTITIES: user_input.get(CONF_REGION_ENTITIES, False),
+                },
+            )
+
+        # Show the submitted values again when asking to confirm unknown streets
+        current = user_input if user_input is not None else self.config_entry.options
+        data_schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_STREETS, default=streets if user_input is not None else entry_addresses(self.config_entry)
+                ): _street_selector(index, multiple=True),
+                vol.Optional(CONF_ADDRESS_ENTITIES, default=current.get(CONF_ADDRESS_ENTITIES, False)): bool,
+                vol.Optional(CONF_PROXIMITY, default=current.get(CONF_PROXIMITY, False)): bool,
+                vol.Optional(CONF_RADIUS, default=current.get(CONF_RADIUS, DEFAULT_RADIUS)): NumberSelector(
+                    NumberSelectorConfig(
+                        min=0.1, max=50, step=0.1, unit_of_measurement="km", mode=NumberSelectorMode.BOX
+                    )
+                ),
+                vol.Optional(CONF_REGION_ENTITIES, default=current.get(CONF_REGION_ENTITIES, False)): bool,
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=data_schema, errors=errors)
@@ -2,15 +2,65 @@
 
 DOMAIN = "enea_outages"
 PLATFORMS = ["sensor", "binary_sensor"]
+DATA_COORDINATORS = f"{DOMAIN}_coordinators"
+DATA_GAZETTEER = f"{DOMAIN}_gazetteer"
+DATA_STATE_WRITER = f"{DOMAIN}_state_writer"
+DATA_EXECUTOR = f"{DOMAIN}_executor"
+DATA_CACHE = f"{DOMAIN}_cache"
+DATA_OCCUPANCY = f"{DOMAIN}_occupancy"
+DATA_REGION_HOSTS = f"{DOMAIN}_region_hosts"
+DATA_PROFILER = f"{DOMAIN}_profiler"
 
 CONF_REGION = "region"
 CONF_STREET = "street"
+CONF_STREETS = "streets"
+CONF_ADDRESS_ENTITIES = "address_entities"
+CONF_PROXIMITY = "proximity"
+CONF_RADIUS = "radius"
+CONF_REGION_ENTITIES = "region_entities"
+CONF_MAX_WORKERS = "max_workers"
+CONF_MAX_QUEUE = "max_queue"
+CONF_CACHE_DIR = "cache_dir"
+CONF_LOCATIONS = "locations"
 
 DEFAULT_REGION = "Poznań"
+DEFAULT_RADIUS = 2.0  # kilometers around the home zone
 DEFAULT_PLANNED_SCAN_INTERVAL = 3600  # 1 hour
 DEFAULT_UNPLANNED_SCAN_INTERVAL = 600  # 10 minutes
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 2  # consecutive failures before the circuit opens
+DEFAULT_CIRCUIT_PROBE_INTERVAL = 1800  # 30 minutes
+DEFAULT_CIRCUIT_MAX_PROBE_INTERVAL = 14400  # 4 hours
+DEFAULT_RELEASE_GRACE_PERIOD = 300  # 5 minutes
+DEFAULT_CACHE_LEASE_TTL = 120  # seconds an instance may hold the fetch lease
+DEFAULT_CACHE_WAIT = 30  # seconds to wait for another instance's first snapshot
+DEFAULT_OCCUPANCY_DAYS = 3  # days ahead covered by the occupancy map
+MAX_STREET_SUGGESTIONS = 200  # names offered by the street selectors
+MIN_STREET_PREFIX = 4  # characters of a street name prefix accepted as known
+MAX_REGION_STREETS = 50  # street names listed in the attributes of a region sensor
+DEFAULT_EXECUTOR_MAX_WORKERS = 2  # threads for blocking Enea calls
+DEFAULT_EXPORTER_PORT = 9120  # port of the headless Prometheus exporter
+DEFAULT_EXPORTER_TIMEZONE = "Europe/Warsaw"  # zone of the outage times published by Enea
+DEFAULT_EXECUTOR_MAX_QUEUE = 8  # jobs waiting for a thread before new ones are shed
+DEFAULT_STATE_WRITE_WINDOW = 1  # seconds, 0 coalesces within one event loop tick only
+DEFAULT_STATE_WRITE_BATCH_SIZE = 100  # entity writes per event loop tick
+DEFAULT_PROFILE_CYCLES = 3
+DEFAULT_PROFILE_BUDGET_MS = 5.0
+DEFAULT_PROFILE_DEADLINE_SLACK = 300  # seconds past the expected cycles before a profile is finished as is
 
 ATTR_OUTAGE_TYPE = "outage_type"
 ATTR_DESCRIPTION = "description"
 ATTR_START_TIME = "start_time"
 ATTR_END_TIME = "end_time"
+ATTR_DATA_AGE = "data_age"
+ATTR_STALE = "stale"
+ATTR_STREETS = "streets"
+ATTR_NEXT_OUTAGE_START = "next_outage_start"
+ATTR_NEXT_OUTAGE_END = "next_outage_end"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_START = "start"
+ATTR_DURATION = "duration"
+
+ATTR_REGIONS = "regions"
+ATTR_OUTAGE_TYPES = "outage_types"
+ATTR_CYCLES = "cycles"
+ATTR_BUDGET_MS = "budget_ms"
@@ -0,0 +1,320 @@
+"""Data update coordinators for the Enea Outages integration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import AbstractContextManager, nullcontext
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from enea_outages.client import EneaOutagesClient
+from enea_outages.models import Outage, OutageType
+from homeassistant import config_entries
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .aggregate import RegionSummary, summarize
+from .circuit import CircuitBreaker
+from .const import (
+    DOMAIN,
+    DATA_CACHE,
+    DATA_COORDINATORS,
+    DATA_GAZETTEER,
+    DEFAULT_PLANNED_SCAN_INTERVAL,
+    DEFAULT_UNPLANNED_SCAN_INTERVAL,
+    DEFAULT_RELEASE_GRACE_PERIOD,
+    ATTR_DATA_AGE,
+    ATTR_STALE,
+)
+from .executor import ExecutorBusy, async_get_executor
+from .gazetteer import GAZETTEER_FILE, USER_GAZETTEER_FILE, Gazetteer
+from .matching import AddressMatcher
+from .profiler import UpdateProfiler
+from .retention import SlidingWindow
+from .spatial import GridIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds after an outage ends before it is evicted, as it still counts as active at its end time
+EVICTION_DELAY = 1
+
+
+class EneaOutagesOutageTypeCoordinator(DataUpdateCoordinator):
+    """Class to manage fetching Enea Outages data for a specific outage type."""
+
+    def __init__(self, hass: HomeAssistant, region: str, outage_type: OutageType, breaker: CircuitBreaker) -> None:
+        """Initialize."""
+        self.region = region
+        self.outage_type = outage_type
+        self.matcher = AddressMatcher()
+        self.breaker = breaker
+        self.stale = False
+        self.last_success: datetime | None = None
+        self.summary = RegionSummary()
+        self.window = SlidingWindow()
+        self._evict_unsub: CALLBACK_TYPE | None = None
+        self.profiler: UpdateProfiler | None = None
+        self.gazetteer: Gazetteer | None = None
+        self._spatial: GridIndex | None = None
+        self._spatial_source: list[Outage] | None = None
+        update_interval = (
+            DEFAULT_PLANNED_SCAN_INTERVAL if outage_type == OutageType.PLANNED else DEFAULT_UNPLANNED_SCAN_INTERVAL
+        )
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN}_{region}_{outage_type.value}",
+            update_interval=timedelta(seconds=update_interval),
+        )
+
+    async def _async_update_data(self) -> list[Outage]:
+        """Fetch data from Enea API for the specific outage type."""
+        if self.data is not None and not self.breaker.allow_request():
+            # The circuit is open: keep serving the last good snapshot until the next probe. Without a
+            # snapshot there is nothing to serve, so setup retries always go upstream
+            return self._stale_data(UpdateFailed(f"Circuit open for Enea API in {self.region}"))
+
+        try:
+            with self._profile_phase("fetch"):
+                if (cache := self.hass.data.get(DATA_CACHE)) is not None:
+                    outages = await cache.async_fetch(
+                        self.region, self.outage_type, self.update_interval, self._async_fetch
+                    )
+                else:
+                    outages = await self._async_fetch()
+        except ExecutorBusy as err:
+            # Shed locally, not an upstream failure, so the circuit is left alone
+            return self._stale_data(UpdateFailed(f"Skipped {self.outage_type.name} update in {self.region}: {err}"))
+        except Exception as err:
+            self.breaker.record_failure()
+            return self._stale_data(
+                UpdateFailed(f"Error communicating with Enea API for {self.outage_type.name} in {self.region}: {err}")
+            )
+
+        self.breaker.record_success()
+        self.stale = False
+        self.last_success = dt_util.utcnow()
+
+        # Keep only live and upcoming outages, ordered by end time
+        with self._profile_phase("retain"):
+            outages = self.window.replace(outages, datetime.now())
+        self._async_schedule_eviction()
+
+        # Match every watched address in one pass, shared by all entries of the region
+        with self._profile_phase("match"):
+            self.matcher.rebuild(outages)
+        # Region-wide figures, shared by the region entities
+        with self._profile_phase("aggregate"):
+            self.summary = summarize(outages, datetime.now())
+        return outages
+
+    async def _async_fetch(self) -> list[Outage]:
+        """Fetch the outages from Enea on the integration executor."""
+        client = EneaOutagesClient()
+        job = partial(client.get_outages_for_region, region=self.region, outage_type=self.outage_type)
+        if self.profiler is not None:
+            job = self.profiler.wrap_job(job)
+        return await async_get_executor(self.hass).async_run(job, sheddable=self.data is not None)
+
+    @callback
+    def async_set_updated_data(self, data: list[Outage]) -> None:
+        """Replace the data from outside an update, keeping the window, address matches and summary in sync."""
+        data = self.window.replace(data, datetime.now())
+        self._async_schedule_eviction()
+        self.matcher.rebuild(data)
+        self.summary = summarize(data, datetime.now())
+        super().async_set_updated_data(data)
+
+    @callback
+    def _async_schedule_eviction(self) -> None:
+        """Schedule the eviction of the next outage to end."""
+        if self._evict_unsub is not None:
+            self._evict_unsub()
+            self._evict_unsub = None
+        if (expiry := self.window.next_expiry) is None:
+            return
+        self._evict_unsub = async_call_later(
+            self.hass,
+            max((expiry - datetime.now()).total_seconds(), 0) + EVICTION_DELAY,
+            HassJob(self._async_evict_expired, f"{DOMAIN} evict {self.name}", cancel_on_shutdown=True),
+        )
+
+    @callback
+    def _async_evict_expired(self, _now: datetime) -> None:
+        """Drop the outages that ended since the last update and notify the listeners."""
+        self._evict_unsub = None
+        if self.window.evict(datetime.now()):
+            self.data = self.window.outages
+            self.matcher.rebuild(self.data)
+            self.summary = summarize(self.data, datetime.now())
+            self.async_update_listeners()
+        self._async_schedule_eviction()
+
+    async def async_shutdown(self) -> None:
+        """Cancel the pending eviction, detach any profile and shut the coordinator down."""
+        if self._evict_unsub is not None:
+            self._evict_unsub()
+            self._evict_unsub = None
+        if (profiler := self.profiler) is not None:
+            self.profiler = None
+            profiler.async_coordinator_shutdown(self)
+        await super().async_shutdown()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners, profiling them if requested."""
+        if (profiler := self.profiler) is None:
+            super().async_update_listeners()
+            return
+        with self._profile_phase("listeners"), profiler.profile_loop():
+            super().async_update_listeners()
+        profiler.async_cycle_done(self)
+
+    def _profile_phase(self, name: str) -> AbstractContextManager[None]:
+        """Return a context measuring a phase of the update cycle while profiling."""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(self, name)
+
+    def _stale_data(self, err: UpdateFailed) -> list[Outage]:
+        """Return the last good snapshot, or raise if there is none yet."""
+        if self.data is None:
+            raise err
+        if not self.stale:
+            _LOGGER.warning("%s, serving data from %s", err, self.last_success)
+        self.stale = True
+        return self.data
+
+    @property
+    def freshness_attributes(self) -> dict[str, Any]:
+        """Return the age of the served data and whether it is stale."""
+        data_age = None
+        if self.last_success is not None:
+            data_age = int((dt_util.utcnow() - self.last_success).total_seconds())
+        return {ATTR_DATA_AGE: data_age, ATTR_STALE: self.stale}
+
+    def outages_for(self, addresses: list[str], near: tuple[float, float, float] | None = None) -> list[Outage]:
+        """Return the outages matching any of the addresses or near a point, or all outages if neither is given."""
+        if not addresses and near is None:
+            return list(self.data)
+        indexes = self.matcher.indexes(addresses)
+        if near is not None:
+            indexes |= self._outages_near(*near)
+        return [self.data[index] for index in sorted(indexes)]
+
+    def _outages_near(self, latitude: float, longitude: float, radius: float) -> set[int]:
+        """Return the indexes of the outages geocoded within a radius of a point."""
+        if self.gazetteer is None:
+            return set()
+        if self._spatial_source is not self.data:
+            # Geocode each snapshot once, shared by every entry of the region
+            with self._profile_phase("geocode"):
+                self._spatial = self.gazetteer.index(self.data, self.region)
+            self._spatial_source = self.data
+        return self._spatial.query_radius(latitude, longitude, radius)
+
+
+class CoordinatorRegistry:
+    """Reference-counted coordinators per region and outage type, shared by all entries.
+
+    A coordinator is created and refreshed by the first entry acquiring it and is
+    only shut down a grace period after the last entry released it, so reloads
+    and quick re-adds reuse its warm data instead of fetching again.
+    """
+
+    def __init__(self, hass: HomeAssistant, grace_period: float = DEFAULT_RELEASE_GRACE_PERIOD) -> None:
+        """Initialize the registry."""
+        self.hass = hass
+        self.grace_period = grace_period
+        self._coordinators: dict[tuple[str, OutageType], EneaOutagesOutageTypeCoordinator] = {}
+        self._refs: dict[tuple[str, OutageType], int] = {}
+        self._locks: dict[tuple[str, OutageType], asyncio.Lock] = {}
+        self._release_timers: dict[tuple[str, OutageType], CALLBACK_TYPE] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    @property
+    def coordinators(self) -> list[EneaOutagesOutageTypeCoordinator]:
+        """Return all live coordinators, including those waiting to be released."""
+        return list(self._coordinators.values())
+
+    def get(self, region: str, outage_type: OutageType) -> EneaOutagesOutageTypeCoordinator | None:
+        """Return the live coordinator for a region and outage type, if any."""
+        return self._coordinators.get((region, outage_type))
+
+    async def async_acquire(self, region: str, outage_type: OutageType) -> EneaOutagesOutageTypeCoordinator:
+        """Return a refreshed coordinator for a region and outage type, taking a reference to it."""
+        key = (region, outage_type)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            if (coordinator := self._coordinators.get(key)) is None:
+                # Coordinators are shared between entries, so they must not be bound to the entry being set up
+                token = config_entries.current_entry.set(None)
+                try:
+                    coordinator = EneaOutagesOutageTypeCoordinator(
+                        self.hass, region, outage_type, self._breakers.setdefault(region, CircuitBreaker())
+                    )
+                finally:
+                    config_entries.current_entry.reset(token)
+                # Not bound to an entry, so the first refresh of the entry helpers does not apply
+                await coordinator.async_refresh()
+                if not coordinator.last_update_success:
+                    raise ConfigEntryNotReady from coordinator.last_exception
+                await coordinator.async_register_shutdown()
+                self._coordinators[key] = coordinator
+
+            self._refs[key] = self._refs.get(key, 0) + 1
+            if (cancel := self._release_timers.pop(key, None)) is not None:
+                cancel()
+        return coordinator
+
+    @callback
+    def async_release(self, coordinator: EneaOutagesOutageTypeCoordinator) -> None:
+        """Drop a reference to a coordinator, shutting it down after the grace period."""
+        key = (coordinator.region, coordinator.outage_type)
+        self._refs[key] -= 1
+        if self._refs[key]:
+            return
+        del self._refs[key]
+        self._release_timers[key] = async_call_later(
+            self.hass,
+            self.grace_period,
+            HassJob(partial(self._async_expire, key), f"{DOMAIN} release {coordinator.name}", cancel_on_shutdown=True),
+        )
+
+    async def _async_expire(self, key: tuple[str, OutageType], _now: datetime) -> None:
+        """Shut down a coordinator nobody re-acquired during the grace period."""
+        self._release_timers.pop(key, None)
+        if key in self._refs:
+            return
+        coordinator = self._coordinators.pop(key)
+        self._locks.pop(key, None)
+        await coordinator.async_shutdown()
+
+        region = key[0]
+        if not any(other_region == region for other_region, _ in self._coordinators):
+            self._breakers.pop(region, None)
+        if not self._coordinators:
+            # Config flows may still be fetching the region catalogue, let their jobs complete
+            async_get_executor(self.hass).async_shutdown(cancel_jobs=False)
+
+
+@callback
+def async_get_registry(hass: HomeAssistant) -> CoordinatorRegistry:
+    """Return the coordinator registry of this Home Assistant instance."""
+    if DATA_COORDINATORS not in hass.data:
+        hass.data[DATA_COORDINATORS] = CoordinatorRegistry(hass)
+    return hass.data[DATA_COORDINATORS]
+
+
+async def async_get_gazetteer(hass: HomeAssistant) -> Gazetteer:
+    """Return the offline gazetteer, extended by an optional file in the config directory."""
+    if DATA_GAZETTEER not in hass.data:
+        hass.data[DATA_GAZETTEER] = await hass.async_add_executor_job(
+            Gazetteer.from_files, GAZETTEER_FILE, Path(hass.config.path(USER_GAZETTEER_FILE))
+        )
+    return hass.data[DATA_GAZETTEER]
@@ -0,0 +1,399 @@
+"""Headless outage monitor serving Prometheus metrics, without Home Assistant.
+
+It runs the same matching, circuit breaker and evaluation code as the
+integration for a list of regions and streets. Run it as a file, so that the
+integration package, and Home Assistant with it, is never imported:
+
+    python custom_components/enea_outages/daemon.py "Poznań:Wojska Polskiego,Głogowska" Szczecin
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, tzinfo
+from functools import partial
+from pathlib import Path
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+if not __package__:
+    # Run as a file: load the sibling modules as a package, skipping the Home Assistant __init__
+    __package__ = "enea_outages_daemon"
+    _directory = str(Path(__file__).resolve().parent)
+    _package = types.ModuleType(__package__)
+    _package.__path__ = [_directory]
+    sys.modules[__package__] = _package
+    if sys.path and sys.path[0] == _directory:
+        del sys.path[0]
+
+from enea_outages.client import EneaOutagesClient
+from enea_outages.models import Outage, OutageType
+
+from .aggregate import RegionSummary, summarize
+from .circuit import CircuitBreaker
+from .const import (
+    DEFAULT_EXECUTOR_MAX_WORKERS,
+    DEFAULT_EXPORTER_PORT,
+    DEFAULT_EXPORTER_TIMEZONE,
+    DEFAULT_PLANNED_SCAN_INTERVAL,
+    DEFAULT_UNPLANNED_SCAN_INTERVAL,
+)
+from .evaluation import is_active
+from .matching import AddressMatcher
+from .retention import SlidingWindow
+
+_LOGGER = logging.getLogger(__name__)
+
+# Upper bounds of the fetch latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Seconds a client may take to send its request
+REQUEST_TIMEOUT = 10
+
+
+@dataclass
+class Histogram:
+    """Cumulative histogram in the Prometheus layout."""
+
+    buckets: tuple[float, ...] = LATENCY_BUCKETS
+    counts: list[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+    sum: float = 0.0
+    count: int = 0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[position] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Feed:
+    """Outages of one region and outage type, fetched on an interval."""
+
+    def __init__(
+        self, region: str, outage_type: OutageType, streets: list[str], breaker: CircuitBreaker, interval: float
+    ) -> None:
+        """Initialize the feed."""
+        self.region = region
+        self.outage_type = outage_type
+        self.streets = streets
+        self.breaker = breaker
+        self.interval = interval
+        self.matcher = AddressMatcher()
+        self.matcher.register(streets, None)
+        self.window = SlidingWindow()
+        self.data: list[Outage] | None = None
+        self.summary = RegionSummary()
+        self.stale = False
+        self.last_success: float | None = None
+        self.failures = 0
+        self.latency = Histogram()
+
+    def outages_for(self, streets: list[str]) -> list[Outage]:
+        """Return the outages matching any of the streets, or all outages if none is given."""
+        if self.data is None:
+            return []
+        if not streets:
+            return list(self.data)
+        return [self.data[index] for index in sorted(self.matcher.indexes(streets))]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    """Return a Prometheus label set."""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class OutageDaemon:
+    """Fetch the outages of the watched regions and render them as Prometheus metrics.
+
+    Each region and outage type is fetched on its own interval through a small
+    thread pool, behind one circuit breaker per region. A failed fetch keeps
+    the last good snapshot and marks it stale, like the integration does.
+    Outage times are naive local times of the given zone, whatever the zone
+    of the host running the daemon.
+    """
+
+    def __init__(
+        self,
+        watches: dict[str, list[str]],
+        max_workers: int = DEFAULT_EXECUTOR_MAX_WORKERS,
+        timezone: tzinfo | None = None,
+    ) -> None:
+        """Initialize the daemon for a mapping of regions to watched streets."""
+        self.watches = watches
+        self.timezone = timezone or ZoneInfo(DEFAULT_EXPORTER_TIMEZONE)
+        self.feeds: list[Feed] = []
+        for region, streets in watches.items():
+            breaker = CircuitBreaker()
+            self.feeds.append(Feed(region, OutageType.PLANNED, streets, breaker, DEFAULT_PLANNED_SCAN_INTERVAL))
+            self.feeds.append(Feed(region, OutageType.UNPLANNED, streets, breaker, DEFAULT_UNPLANNED_SCAN_INTERVAL))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="enea_outages_daemon")
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start refreshing every feed on its interval."""
+        for feed in self.feeds:
+            self._tasks.append(asyncio.create_task(self._async_run(feed)))
+
+    async def async_stop(self) -> None:
+        """Stop refreshing and shut the thread pool down."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    def _now(self) -> datetime:
+        """Return the current time in the zone of the outage times, as naive like them."""
+        return datetime.now(self.timezone).replace(tzinfo=None)
+
+    def _timestamp(self, moment: datetime) -> float:
+        """Return the Unix timestamp of an outage time."""
+        return moment.replace(tzinfo=self.timezone).timestamp()
+
+    async def _async_run(self, feed: Feed) -> None:
+        """Refresh a feed forever."""
+        while True:
+            await self.async_refresh(feed)
+            await asyncio.sleep(feed.interval)
+
+    async def async_refresh(self, feed: Feed) -> None:
+        """Fetch a feed once, keeping its last good snapshot on failure."""
+        if not feed.breaker.allow_request():
+            feed.stale = feed.data is not None
+            return
+
+        client = EneaOutagesClient()
+        job = partial(client.get_outages_for_region, region=feed.region, outage_type=feed.outage_type)
+        start = time.perf_counter()
+        try:
+            outages = await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        except Exception as err:
+            feed.latency.observe(time.perf_counter() - start)
+            feed.breaker.record_failure()
+            feed.failures += 1
+            feed.stale = feed.data is not None
+            _LOGGER.warning("Error fetching %s outages in %s: %s", feed.outage_type.name, feed.region, err)
+            return
+        feed.latency.observe(time.perf_counter() - start)
+
+        feed.breaker.record_success()
+        feed.stale = False
+        feed.last_success = time.time()
+        self._ingest(feed, feed.window.replace(outages, self._now()))
+
+    def _ingest(self, feed: Feed, outages: list[Outage]) -> None:
+        """Serve the live outages of a feed, matching and summarizing them once."""
+        feed.data = outages
+        feed.matcher.rebuild(outages)
+        feed.summary = summarize(outages, self._now())
+
+    def render(self) -> str:
+        """Return the current metrics in the Prometheus text format."""
+        now = self._now()
+        metrics: dict[str, tuple[str, str, list[str]]] = {}
+
+        def _sample(name: str, kind: str, help_text: str, labels: str, value: float) -> None:
+            metrics.setdefault(name, (kind, help_text, []))[2].append(f"{name}{labels} {value}")
+
+        def _histogram(name: str, help_text: str, labels: dict[str, str], histogram: Histogram) -> None:
+            samples = metrics.setdefault(name, ("histogram", help_text, []))[2]
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                samples.append(f"{name}_bucket{_labels(**labels, le=str(bound))} {count}")
+            samples.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+            samples.append(f"{name}_sum{_labels(**labels)} {histogram.sum}")
+            samples.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+
+        for feed in self.feeds:
+            # Outages that ended since the last fetch are evicted when scraped
+            if feed.window.evict(now):
+                self._ingest(feed, feed.window.outages)
+
+            outage_type = feed.outage_type.name.lower()
+            labels = _labels(region=feed.region, outage_type=outage_type)
+            if feed.data is not None:
+                _sample(
+                    "enea_outages_outages", "gauge", "Outages published for the region.", labels, feed.summary.count
+                )
+                _sample(
+                    "enea_outages_affected_streets",
+                    "gauge",
+                    "Distinct streets named by the outages of the region.",
+                    labels,
+                    len(feed.summary.streets),
+                )
+                for street in feed.streets:
+                    _sample(
+                        "enea_outages_matched_outages",
+                        "gauge",
+                        "Outages matching a watched street.",
+                        _labels(region=feed.region, outage_type=outage_type, street=street),
+                        len(feed.outages_for([street])),
+                    )
+            if feed.outage_type == OutageType.PLANNED and feed.summary.next_start is not None:
+                _sample(
+                    "enea_outages_next_start_timestamp_seconds",
+                    "gauge",
+                    "Start of the next planned outage in the region.",
+                    _labels(region=feed.region),
+                    self._timestamp(feed.summary.next_start),
+                )
+            if feed.outage_type == OutageType.UNPLANNED and feed.summary.latest_end is not None:
+                _sample(
+                    "enea_outages_latest_restoration_timestamp_seconds",
+                    "gauge",
+                    "Latest expected restoration in the region.",
+                    _labels(region=feed.region),
+                    self._timestamp(feed.summary.latest_end),
+                )
+            _sample("enea_outages_stale", "gauge", "Whether the served data is stale.", labels, int(feed.stale))
+            if feed.last_success is not None:
+                _sample(
+                    "enea_outages_last_success_timestamp_seconds",
+                    "gauge",
+                    "Time of the last successful fetch.",
+                    labels,
+                    feed.last_success,
+                )
+            _sample("enea_outages_fetch_failures_total", "counter", "Failed fetches.", labels, feed.failures)
+
+            _histogram(
+                "enea_outages_fetch_duration_seconds",
+                "Duration of the fetches from Enea.",
+                {"region": feed.region, "outage_type": outage_type},
+                feed.latency,
+            )
+
+        # Regions are active when any of their outages is in progress, per watched street
+        feeds = {(feed.region, feed.outage_type): feed for feed in self.feeds}
+        for region, streets in self.watches.items():
+            planned, unplanned = feeds[(region, OutageType.PLANNED)], feeds[(region, OutageType.UNPLANNED)]
+            for street in streets or [""]:
+                selection = [street] if street else []
+                _sample(
+                    "enea_outages_active",
+                    "gauge",
+                    "Whether an outage is in progress at a watched street, or in the region for an empty street.",
+                    _labels(region=region, street=street),
+                    int(is_active(planned.outages_for(selection), unplanned.outages_for(selection), now)),
+                )
+            _sample(
+                "enea_outages_circuit_open",
+                "gauge",
+                "Whether requests to Enea are held back for the region.",
+                _labels(region=region),
+                int(planned.breaker.is_open),
+            )
+
+        lines = []
+        for name, (kind, help_text, samples) in metrics.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    async def async_serve(self, host: str, port: int) -> asyncio.Server:
+        """Serve the metrics on /metrics."""
+        return await asyncio.start_server(self._async_handle, host, port)
+
+    async def _async_handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer one HTTP request."""
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+            while await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT) not in (b"\r\n", b"\n", b""):
+                pass
+            method, path = ([*request_line.decode("latin-1").split(), "", ""])[:2]
+            if method == "GET" and path.split("?")[0] == "/metrics":
+                status, content_type, body = "200 OK", "text/plain; version=0.0.4; charset=utf-8", self.render()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain; charset=utf-8", "Not found\n"
+            payload = body.encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):  # noqa: UP041
+            # Not the builtin TimeoutError before Python 3.11
+            pass
+        finally:
+            writer.close()
+
+
+def parse_watch(value: str) -> tuple[str, list[str]]:
+    """Parse a REGION[:STREET,...] argument."""
+    region, _, streets = value.partition(":")
+    if not region.strip():
+        raise argparse.ArgumentTypeError(f"missing region in {value!r}")
+    return region.strip(), [street.strip() for street in streets.split(",") if street.strip()]
+
+
+def parse_timezone(value: str) -> tzinfo:
+    """Parse a time zone name such as Europe/Warsaw."""
+    try:
+        return ZoneInfo(value)
+    except (ValueError, ZoneInfoNotFoundError) as err:
+        raise argparse.ArgumentTypeError(f"unknown time zone {value!r}") from err
+
+
+async def _async_main(args: argparse.Namespace) -> None:
+    """Run the daemon until interrupted."""
+    watches: dict[str, list[str]] = {}
+    for region, streets in args.watch:
+        watched = watches.setdefault(region, [])
+        watched.extend(street for street in streets if street not in watched)
+
+    daemon = OutageDaemon(watches, args.workers, args.timezone)
+    server = await daemon.async_serve(args.host, args.port)
+    _LOGGER.info("Serving metrics for %s on %s:%d", ", ".join(watches), args.host, args.port)
+    daemon.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    await stop.wait()
+
+    server.close()
+    await server.wait_closed()
+    await daemon.async_stop()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Parse the command line and run the daemon."""
+    parser = argparse.ArgumentParser(description="Serve Enea outages of the watched regions as Prometheus metrics.")
+    parser.add_argument(
+        "watch", nargs="+", type=parse_watch, metavar="REGION[:STREET,...]", help="region and optional streets"
+    )
+    parser.add_argument("--host", default="0.0.0.0", help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_EXPORTER_PORT, help="port to listen on")
+    parser.add_argument("--workers", type=int, default=DEFAULT_EXECUTOR_MAX_WORKERS, help="threads fetching from Enea")
+    parser.add_argument(
+        "--timezone",
+        type=parse_timezone,
+        default=DEFAULT_EXPORTER_TIMEZONE,
+        help="time zone of the outage times published by Enea",
+    )
+    parser.add_argument("--log-level", default="INFO", help="logging level")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(_async_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Shared entity helpers for the Enea Outages integration."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import DeviceInfo, Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import slugify
+
+from .const import (
+    CONF_ADDRESS_ENTITIES,
+    CONF_PROXIMITY,
+    CONF_RADIUS,
+    CONF_REGION,
+    CONF_REGION_ENTITIES,
+    CONF_STREET,
+    CONF_STREETS,
+    DEFAULT_RADIUS,
+    DOMAIN,
+    DATA_REGION_HOSTS,
+)
+
+
+def entry_addresses(config_entry: ConfigEntry) -> list[str]:
+    """Return the addresses watched by a config entry."""
+    if CONF_STREETS in config_entry.options:
+        return [street for street in config_entry.options[CONF_STREETS] if street.strip()]
+    street = config_entry.data.get(CONF_STREET)
+    return [street] if street else []
+
+
+def entry_proximity(hass: HomeAssistant, config_entry: ConfigEntry) -> tuple[float, float, float] | None:
+    """Return the home zone point and radius of an entry in proximity mode."""
+    if not config_entry.options.get(CONF_PROXIMITY):
+        return None
+    return hass.config.latitude, hass.config.longitude, config_entry.options.get(CONF_RADIUS, DEFAULT_RADIUS)
+
+
+def entry_title(region: str, street: str | None) -> str:
+    """Return the title of the entry for a region and street."""
+    title = region
+    if street:
+        title += f", {street}"
+    return title
+
+
+def entry_device_info(config_entry: ConfigEntry) -> DeviceInfo:
+    """Return the device info for the entities of an entry, named after the region and street of its title."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, config_entry.entry_id)},
+        name=f"Enea Outages ({entry_title(config_entry.data[CONF_REGION], config_entry.data.get(CONF_STREET))})",
+        model="Enea Outages Monitor",
+        manufacturer="Enea Operator",
+    )
+
+
+def address_device_info(config_entry: ConfigEntry, address: str) -> DeviceInfo:
+    """Return the device info for the per-address entities of an entry."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, f"{config_entry.entry_id}_{slugify(address)}")},
+        name=f"Enea Outages ({config_entry.data[CONF_REGION]} - {address})",
+        model="Enea Outages Monitor",
+        manufacturer="Enea Operator",
+        via_device=(DOMAIN, config_entry.entry_id),
+    )
+
+
+def region_device_info(region: str) -> DeviceInfo:
+    """Return the device info for the region entities, shared by all entries of the region."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, f"region_{slugify(region)}")},
+        name=f"Enea Outages ({region})",
+        model="Enea Outages Region",
+        manufacturer="Enea Operator",
+    )
+
+
+@callback
+def async_claim_region_entities(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    region_entities: Callable[[], list[Entity]],
+) -> None:
+    """Offer an entry to host the entities of its region, if enabled in its options.
+
+    The entities exist once per region, so only the first entry claiming them
+    adds them. Each claimant leaves a callback adding them through its own
+    platform, so when the host unloads the next claimant takes over without
+    its entry being reloaded.
+    """
+    if not config_entry.options.get(CONF_REGION_ENTITIES):
+        return
+    region = config_entry.data[CONF_REGION]
+    claimants: list[Callable[[], None]] = hass.data.setdefault(DATA_REGION_HOSTS, {}).setdefault(region, [])
+
+    @callback
+    def _async_host() -> None:
+        async_add_entities(region_entities())
+
+    claimants.append(_async_host)
+    if claimants[0] is _async_host:
+        _async_host()
+
+    @callback
+    def _async_release() -> None:
+        hosted = claimants[0] is _async_host
+        claimants.remove(_async_host)
+        if not claimants:
+            del hass.data[DATA_REGION_HOSTS][region]
+        elif hosted:
+            claimants[0]()
+
+    config_entry.async_on_unload(_async_release)
+
+
+@callback
+def async_track_matched_addresses(
+    config_entry: ConfigEntry,
+    coordinators: list,
+    async_add_entities: AddEntitiesCallback,
+    entities_for_address: Callable[[str], list[Entity]],
+) -> None:
+    """Add per-address entities once an address matches an outage.
+
+    Entities are only created for addresses that actually appear in the
+    coordinator data, so watching many streets does not cost an entity set per
+    street up front.
+    """
+    if not config_entry.options.get(CONF_ADDRESS_ENTITIES):
+        return
+
+    added: set[str] = set()
+
+    @callback
+    def _async_add_matched() -> None:
+        new_entities: list[Entity] = []
+        for address in entry_addresses(config_entry):
+            if address in added:
+                continue
+            if any(coordinator.matcher.has_matches(address) for coordinator in coordinators):
+                added.add(address)
+                new_entities.extend(entities_for_address(address))
+        if new_entities:
+            async_add_entities(new_entities)
+
+    _async_add_matched()
+    for coordinator in coordinators:
+        config_entry.async_on_unload(coordinator.async_add_listener(_async_add_matched))
@@ -0,0 +1,22 @@
+"""Outage evaluation shared by the entities and the headless exporter."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime
+
+from enea_outages.models import Outage
+
+
+def is_active(planned: Iterable[Outage], unplanned: Iterable[Outage], now: datetime) -> bool:
+    """Return whether any planned or unplanned outage is in progress at a time."""
+    for outage in planned:
+        if outage.start_time and outage.end_time and outage.start_time <= now <= outage.end_time:
+            return True
+
+    for outage in unplanned:
+        # Unplanned outages typically only have an end_time. Assume they are active if end_time is in the future.
+        if outage.end_time and now <= outage.end_time:
+            return True
+
+    return False
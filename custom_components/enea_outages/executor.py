@@ -0,0 +1,139 @@
+"""Bounded thread pool for the blocking Enea client calls."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, TypeVar
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DATA_EXECUTOR, DEFAULT_EXECUTOR_MAX_QUEUE, DEFAULT_EXECUTOR_MAX_WORKERS, DOMAIN
+
+_T = TypeVar("_T")
+
+
+class ExecutorBusy(HomeAssistantError):
+    """Error raised when a job is shed because the fetch queue is full."""
+
+
+class FetchExecutor:
+    """Run the blocking Enea client calls on a small pool of our own.
+
+    The pool is separate from the default executor of Home Assistant, so a
+    stalled Enea server can only tie up our threads. At most `max_queue` jobs
+    wait for a free worker; further jobs are shed with ExecutorBusy instead of
+    queueing without bound, so callers can serve their last data instead.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_workers: int = DEFAULT_EXECUTOR_MAX_WORKERS,
+        max_queue: int = DEFAULT_EXECUTOR_MAX_QUEUE,
+    ) -> None:
+        """Initialize the executor, starting threads only once jobs arrive."""
+        self.hass = hass
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool: ThreadPoolExecutor | None = None
+        self._pending = 0
+        self._running = 0
+        self._peak_queue = 0
+        self._submitted = 0
+        self._shed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._started = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of jobs waiting for a free worker."""
+        return max(self._pending - self._running, 0)
+
+    @property
+    def metrics(self) -> dict[str, Any]:
+        """Return the queue depth and wait time metrics of the pool."""
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "queue_depth": self.queue_depth,
+            "peak_queue_depth": self._peak_queue,
+            "submitted": self._submitted,
+            "shed": self._shed,
+            "wait_avg_ms": round(self._wait_total / self._started * 1000, 1) if self._started else 0.0,
+            "wait_max_ms": round(self._wait_max * 1000, 1),
+        }
+
+    async def async_run(self, job: Callable[..., _T], *args: Any, sheddable: bool = True) -> _T:
+        """Run a blocking job on the pool, shedding it if the queue is full.
+
+        Jobs with nothing to fall back on, like a first refresh, are never shed.
+        """
+        if sheddable and self._pending >= self.max_workers + self.max_queue:
+            self._shed += 1
+            raise ExecutorBusy(f"{self.queue_depth} Enea jobs already waiting for a worker")
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix=DOMAIN)
+        self._submitted += 1
+        self._pending += 1
+        self._peak_queue = max(self._peak_queue, self.queue_depth)
+        try:
+            return await self.hass.loop.run_in_executor(
+                self._pool, partial(self._run_job, time.monotonic(), job, *args)
+            )
+        finally:
+            self._pending -= 1
+
+    def _run_job(self, queued_at: float, job: Callable[..., _T], *args: Any) -> _T:
+        """Run a job in a worker thread, recording how long it waited."""
+        wait = time.monotonic() - queued_at
+        # Counters are only touched under the GIL, a lost update only skews the metrics
+        self._running += 1
+        self._started += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        try:
+            return job(*args)
+        finally:
+            self._running -= 1
+
+    @callback
+    def async_shutdown(self, cancel_jobs: bool = True) -> None:
+        """Let the worker threads go, cancelling the jobs still queued unless told otherwise.
+
+        Nothing waits for the threads: one stuck on a stalled Enea server exits
+        once its call returns, instead of holding a thread of the default
+        executor until then. Later jobs start a new pool.
+        """
+        if (pool := self._pool) is None:
+            return
+        self._pool = None
+        pool.shutdown(wait=False, cancel_futures=cancel_jobs)
+
+
+@callback
+def async_get_executor(hass: HomeAssistant) -> FetchExecutor:
+    """Return the fetch executor of this Home Assistant instance."""
+    if DATA_EXECUTOR not in hass.data:
+        async_setup_executor(hass, DEFAULT_EXECUTOR_MAX_WORKERS, DEFAULT_EXECUTOR_MAX_QUEUE)
+    return hass.data[DATA_EXECUTOR]
+
+
+@callback
+def async_setup_executor(hass: HomeAssistant, max_workers: int, max_queue: int) -> FetchExecutor:
+    """Create the fetch executor, stopping its threads when Home Assistant stops."""
+    executor = hass.data[DATA_EXECUTOR] = FetchExecutor(hass, max_workers, max_queue)
+
+    @callback
+    def _async_shutdown(_event: Event) -> None:
+        executor.async_shutdown()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_shutdown)
+    return executor
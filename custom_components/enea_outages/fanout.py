@@ -0,0 +1,116 @@
+"""Coalesced state writes for the Enea Outages entities."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from contextlib import AbstractContextManager, nullcontext
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import HassJob, HomeAssistant, callback
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.event import async_call_later
+
+from .const import DATA_STATE_WRITER, DEFAULT_STATE_WRITE_BATCH_SIZE, DEFAULT_STATE_WRITE_WINDOW, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class StateWriteCoalescer:
+    """Write the state of dirtied entities once per window, in bounded batches.
+
+    A coordinator update dirties every entity subscribed to it, across all
+    entries of the region, and the active binary sensor is dirtied again by the
+    other coordinator of the region, usually within a second of the first one.
+    Entities dirtied within `window` seconds (one event loop tick if 0) are
+    written once, at most `batch_size` per tick.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        window: float = DEFAULT_STATE_WRITE_WINDOW,
+        batch_size: int = DEFAULT_STATE_WRITE_BATCH_SIZE,
+    ) -> None:
+        """Initialize the coalescer."""
+        self.hass = hass
+        self.window = window
+        self.batch_size = batch_size
+        self.writes = 0
+        self._dirty: dict[Entity, None] = {}
+        self.profiler: Any | None = None
+        self._cancel: Callable[[], None] | None = None
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._flush_job = HassJob(self._async_flush_later, f"{DOMAIN} state writes", cancel_on_shutdown=True)
+
+    @callback
+    def async_schedule(self, entity: Entity) -> None:
+        """Mark an entity as needing a state write."""
+        self._dirty[entity] = None
+        if self._cancel is None:
+            self._async_schedule_flush(self.window)
+
+    @callback
+    def async_discard(self, entity: Entity) -> None:
+        """Forget an entity that is being removed."""
+        self._dirty.pop(entity, None)
+
+    @callback
+    def _async_schedule_flush(self, delay: float) -> None:
+        """Schedule writing the dirty entities."""
+        self._idle.clear()
+        if delay > 0:
+            self._cancel = async_call_later(self.hass, delay, self._flush_job)
+        else:
+            self._cancel = self.hass.async_create_task(self._async_flush(), f"{DOMAIN} state writes").cancel
+
+    @callback
+    def _async_flush_later(self, _now: datetime) -> None:
+        """Write the entities dirtied during the window."""
+        self._async_schedule_flush(0)
+
+    async def _async_flush(self) -> None:
+        """Write the dirty entities, yielding to the event loop between batches."""
+        try:
+            while self._dirty:
+                with self._profile_batch():
+                    self._write_batch(list(self._dirty)[: self.batch_size])
+                await asyncio.sleep(0)
+        finally:
+            self._cancel = None
+            self._idle.set()
+
+    def _write_batch(self, batch: list[Entity]) -> None:
+        """Write the state of a batch of entities."""
+        for entity in batch:
+            del self._dirty[entity]
+            if entity.hass is None or entity.platform is None:
+                continue
+            try:
+                entity.async_write_ha_state()
+            except Exception:
+                # One failing entity must not hold back the rest of the batch
+                _LOGGER.exception("Error writing the state of %s", entity.entity_id)
+                continue
+            self.writes += 1
+
+    def _profile_batch(self) -> AbstractContextManager[None]:
+        """Return a context profiling a batch of writes while profiling."""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.profile_writes()
+
+    async def async_wait_idle(self) -> None:
+        """Wait until the pending state writes are done."""
+        await self._idle.wait()
+
+
+@callback
+def async_get_state_writer(hass: HomeAssistant) -> StateWriteCoalescer:
+    """Return the state write coalescer of this Home Assistant instance."""
+    if DATA_STATE_WRITER not in hass.data:
+        hass.data[DATA_STATE_WRITER] = StateWriteCoalescer(hass)
+    return hass.data[DATA_STATE_WRITER]
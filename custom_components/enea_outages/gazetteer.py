@@ -0,0 +1,112 @@
+"""Offline gazetteer used to place outage descriptions on the map."""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from enea_outages.models import Outage
+
+from .spatial import GridIndex
+
+GAZETTEER_FILE = Path(__file__).parent / "gazetteer.json"
+USER_GAZETTEER_FILE = "enea_outages_gazetteer.json"
+
+# Longest place name, in words, looked up in a description
+MAX_NAME_WORDS = 4
+
+_WORD_RE = re.compile(r"\w+(?:-\w+)*")
+
+
+@dataclass(frozen=True)
+class Place:
+    """A named point, either a locality or a street within the named locality."""
+
+    name: str
+    latitude: float
+    longitude: float
+    region: str | None = None
+    locality: str | None = None
+
+
+def _words(text: str) -> list[str]:
+    """Split text into lowercase words, dropping punctuation."""
+    return _WORD_RE.findall(text.lower())
+
+
+def _words_key(name: str) -> tuple[str, ...]:
+    """Return the lookup key of a place name."""
+    return tuple(_words(name))
+
+
+class Gazetteer:
+    """Look up place names mentioned in outage descriptions.
+
+    Names are indexed by their words, so geocoding a description costs one
+    dictionary lookup per word n-gram instead of a scan over every place.
+    """
+
+    def __init__(self, places: list[Place]) -> None:
+        """Initialize the gazetteer."""
+        self._by_name: dict[tuple[str, ...], list[Place]] = {}
+        for place in places:
+            self._by_name.setdefault(_words_key(place.name), []).append(place)
+
+    def __len__(self) -> int:
+        """Return the number of distinct names."""
+        return len(self._by_name)
+
+    @classmethod
+    def from_files(cls, *paths: Path) -> Gazetteer:
+        """Load and merge gazetteer files, skipping those that do not exist."""
+        places: list[Place] = []
+        for path in paths:
+            if not path.is_file():
+                continue
+            with path.open(encoding="utf-8") as file:
+                data = json.load(file)
+            for region, entries in data["regions"].items():
+                for entry in entries:
+                    places.append(Place(entry["name"], entry["lat"], entry["lon"], region, entry.get("locality")))
+        return cls(places)
+
+    def names(self, region: str) -> list[str]:
+        """Return the names of the places in a region."""
+        return [place.name for places in self._by_name.values() for place in places if place.region == region]
+
+    def geocode(self, description: str, region: str | None = None) -> list[Place]:
+        """Return the places named in a description, preferring those of the region.
+
+        A street of a locality replaces the locality itself, so outages on
+        different streets of a town are not all placed on its centre.
+        """
+        words = _words(description)
+        found: dict[tuple[str, ...], list[Place]] = {}
+        start = 0
+        while start < len(words):
+            # Take the longest name starting at this word, so "Kostrzyn nad Odrą" is not also "Kostrzyn"
+            for size in range(min(MAX_NAME_WORDS, len(words) - start), 0, -1):
+                name = tuple(words[start : start + size])
+                if name in self._by_name:
+                    found.setdefault(name, self._by_name[name])
+                    start += size
+                    break
+            else:
+                start += 1
+
+        places: list[Place] = []
+        for candidates in found.values():
+            in_region = [place for place in candidates if place.region == region]
+            places.extend(in_region or candidates)
+        localities = {_words_key(place.locality) for place in places if place.locality}
+        return [place for place in places if place.locality or _words_key(place.name) not in localities]
+
+    def index(self, outages: list[Outage], region: str | None = None) -> GridIndex:
+        """Build a grid index of the outages by the places their descriptions name."""
+        grid = GridIndex()
+        for position, outage in enumerate(outages):
+            for place in self.geocode(outage.description, region):
+                grid.insert(position, place.latitude, place.longitude)
+        return grid
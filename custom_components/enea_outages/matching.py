@@ -0,0 +1,82 @@
+"""Shared street matching for the Enea Outages integration."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from enea_outages.models import Outage
+
+
+def normalize_address(address: str) -> str:
+    """Return the key used to match an address against outage descriptions."""
+    return " ".join(address.lower().split())
+
+
+class AddressMatcher:
+    """Match the outages of one coordinator against every watched address at once.
+
+    Addresses are reference counted, so entries watching the same street share a
+    single key. Matches are stored as indexes into the coordinator data and are
+    rebuilt in one pass over the outages per update, instead of every entity
+    filtering the full list on its own.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the matcher."""
+        self._refs: dict[str, int] = {}
+        self._matches: dict[str, list[int]] = {}
+
+    @property
+    def keys(self) -> list[str]:
+        """Return the normalized addresses currently watched."""
+        return list(self._refs)
+
+    def register(self, addresses: Iterable[str], outages: list[Outage] | None) -> None:
+        """Start watching addresses, matching any new ones against the current outages."""
+        new_keys = []
+        for address in addresses:
+            key = normalize_address(address)
+            if not key:
+                continue
+            if key not in self._refs:
+                new_keys.append(key)
+            self._refs[key] = self._refs.get(key, 0) + 1
+
+        if new_keys:
+            self._match(new_keys, outages or [])
+
+    def unregister(self, addresses: Iterable[str]) -> None:
+        """Stop watching addresses once no entry references them."""
+        for address in addresses:
+            key = normalize_address(address)
+            if key not in self._refs:
+                continue
+            self._refs[key] -= 1
+            if not self._refs[key]:
+                del self._refs[key]
+                del self._matches[key]
+
+    def rebuild(self, outages: list[Outage]) -> None:
+        """Rematch every watched address against freshly fetched outages."""
+        self._match(list(self._refs), outages)
+
+    def has_matches(self, address: str) -> bool:
+        """Return whether an address matched at least one outage."""
+        return bool(self._matches.get(normalize_address(address)))
+
+    def indexes(self, addresses: Iterable[str]) -> set[int]:
+        """Return the indexes of the outages matching any of the addresses."""
+        indexes: set[int] = set()
+        for address in addresses:
+            indexes.update(self._matches.get(normalize_address(address), ()))
+        return indexes
+
+    def _match(self, keys: list[str], outages: list[Outage]) -> None:
+        """Match the given keys against the outages in a single pass."""
+        matches: dict[str, list[int]] = {key: [] for key in keys}
+        for index, outage in enumerate(outages):
+            description = outage.description.lower()
+            for key in keys:
+                if key in description:
+                    matches[key].append(index)
+        self._matches.update(matches)
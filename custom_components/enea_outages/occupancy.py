@@ -0,0 +1,159 @@
+"""Minute-resolution outage occupancy used to answer time window queries."""
+
+from __future__ import annotations
+
+import bisect
+import math
+from array import array
+from collections import Counter
+from collections.abc import Hashable
+from datetime import datetime, timedelta
+
+from enea_outages.models import Outage
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
+
+from .const import DEFAULT_OCCUPANCY_DAYS
+
+MINUTE = timedelta(minutes=1)
+
+# Minutes the window may lag behind the clock before it is moved forward
+REBASE_AFTER = 60
+
+
+class OccupancyMap:
+    """Count the outages covering each minute of the next days.
+
+    Each source, one per coordinator, is kept as a set of minute intervals, and
+    an update only applies the intervals that changed. A prefix sum of the
+    occupied minutes, rebuilt lazily after an update, answers whether a window
+    holds an outage with two lookups, however long the window.
+    """
+
+    def __init__(self, days: int = DEFAULT_OCCUPANCY_DAYS) -> None:
+        """Initialize an empty map."""
+        self.minutes = days * 24 * 60
+        self.origin: datetime | None = None
+        self._counts = array("H", bytes(2 * self.minutes))
+        self._outages: dict[Hashable, list[Outage]] = {}
+        self._intervals: dict[Hashable, Counter[tuple[int, int]]] = {}
+        self._prefix: array | None = None
+        self._runs: list[tuple[int, int]] = []
+
+    def update(self, source: Hashable, outages: list[Outage], now: datetime) -> None:
+        """Replace the outages of one source."""
+        self._outages[source] = outages
+        origin = now.replace(second=0, microsecond=0)
+        if self.origin is None or (origin - self.origin) / MINUTE >= REBASE_AFTER:
+            self._rebase(origin)
+            return
+
+        new = Counter(self._rasterize(outage) for outage in outages)
+        new.pop(None, None)
+        old = self._intervals.get(source, Counter())
+        for interval, count in (old - new).items():
+            self._add(interval, -count)
+        for interval, count in (new - old).items():
+            self._add(interval, count)
+        self._intervals[source] = new
+
+    def _rebase(self, origin: datetime) -> None:
+        """Move the window to start at origin, rasterizing every source again."""
+        self.origin = origin
+        self._counts = array("H", bytes(2 * self.minutes))
+        self._intervals = {}
+        self._prefix = None
+        for source, outages in self._outages.items():
+            intervals = Counter(self._rasterize(outage) for outage in outages)
+            intervals.pop(None, None)
+            for interval, count in intervals.items():
+                self._add(interval, count)
+            self._intervals[source] = intervals
+
+    def _rasterize(self, outage: Outage) -> tuple[int, int] | None:
+        """Return the minutes of the window an outage covers, None if it covers none.
+
+        An outage without an end is skipped, one without a start is taken to be
+        ongoing.
+        """
+        if outage.end_time is None:
+            return None
+        start = 0
+        if outage.start_time is not None:
+            start = max(math.floor((outage.start_time - self.origin) / MINUTE), 0)
+        end = min(math.ceil((outage.end_time - self.origin) / MINUTE), self.minutes)
+        return (start, end) if start < end else None
+
+    def _add(self, interval: tuple[int, int], count: int) -> None:
+        """Add count to every minute of an interval."""
+        start, end = interval
+        counts = self._counts
+        for minute in range(start, end):
+            counts[minute] += count
+        self._prefix = None
+
+    def _index(self) -> array:
+        """Return the prefix sum of occupied minutes, rebuilding it and the runs if stale."""
+        if self._prefix is None:
+            prefix = array("H", bytes(2 * (self.minutes + 1)))
+            runs: list[tuple[int, int]] = []
+            total = 0
+            for minute, count in enumerate(self._counts):
+                if count:
+                    total += 1
+                    if runs and runs[-1][1] == minute:
+                        runs[-1] = (runs[-1][0], minute + 1)
+                    else:
+                        runs.append((minute, minute + 1))
+                prefix[minute + 1] = total
+            self._prefix, self._runs = prefix, runs
+        return self._prefix
+
+    def _minute(self, when: datetime) -> int:
+        """Return the minute of the window containing a time, clipped to the window."""
+        return min(max(math.floor((when - self.origin) / MINUTE), 0), self.minutes)
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """Return whether a window lies within the minutes of the map."""
+        if self.origin is None:
+            return False
+        return self.origin <= start and end <= self.origin + self.minutes * MINUTE
+
+    def busy_minutes(self, start: datetime, end: datetime) -> int:
+        """Return how many minutes between start and end have an outage, counting only those within the map."""
+        if self.origin is None:
+            return 0
+        prefix = self._index()
+        return prefix[self._minute(end)] - prefix[self._minute(start)]
+
+    def next_outage(self, after: datetime) -> tuple[datetime, datetime] | None:
+        """Return the start and end of the outage ongoing at or following a time."""
+        if self.origin is None:
+            return None
+        self._index()
+        minute = self._minute(after)
+        position = bisect.bisect_right(self._runs, (minute, self.minutes + 1))
+        if position and self._runs[position - 1][1] > minute:
+            position -= 1
+        if position == len(self._runs):
+            return None
+        start, end = self._runs[position]
+        return self.origin + start * MINUTE, self.origin + end * MINUTE
+
+
+@callback
+def async_track_occupancy(
+    config_entry: ConfigEntry, coordinators: list, addresses: list[str], near: tuple[float, float, float] | None
+) -> OccupancyMap:
+    """Return the occupancy map of an entry, kept up to date by its coordinators."""
+    occupancy = OccupancyMap()
+
+    for coordinator in coordinators:
+
+        @callback
+        def _async_update(coordinator=coordinator) -> None:
+            occupancy.update(coordinator.outage_type, coordinator.outages_for(addresses, near), datetime.now())
+
+        _async_update()
+        config_entry.async_on_unload(coordinator.async_add_listener(_async_update))
+    return occupancy
@@ -0,0 +1,305 @@
+"""On-demand profiling of Enea Outages update cycles."""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, DATA_PROFILER, DEFAULT_PROFILE_DEADLINE_SLACK
+from .executor import async_get_executor
+from .fanout import async_get_state_writer
+
+_LOGGER = logging.getLogger(__name__)
+
+REPORT_TOP_FUNCTIONS = 40
+REPORT_TOP_ALLOCATIONS = 20
+
+# Python 3.12+ allows one active cProfile per process, so profiles never overlap
+_PROFILE_LOCK = threading.Lock()
+
+
+@contextmanager
+def _exclusive_profile(profile: cProfile.Profile) -> Iterator[bool]:
+    """Enable a profile unless another one is active, yielding whether it was enabled."""
+    if not _PROFILE_LOCK.acquire(blocking=False):
+        yield False
+        return
+    try:
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiling tool is active in this process
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            profile.disable()
+    finally:
+        _PROFILE_LOCK.release()
+
+
+@dataclass
+class PhaseTiming:
+    """Accumulated wall time of one phase of an update cycle."""
+
+    calls: int = 0
+    total: float = 0.0
+    longest: float = 0.0
+
+    def add(self, duration: float) -> None:
+        """Record one run of the phase."""
+        self.calls += 1
+        self.total += duration
+        self.longest = max(self.longest, duration)
+
+
+@dataclass
+class SlowGetter:
+    """A property getter that exceeded the budget on the event loop."""
+
+    entity_id: str | None
+    name: str
+    duration: float
+
+
+@dataclass
+class UpdateProfiler:
+    """Profile the next update cycles of a set of coordinators and their entities.
+
+    Blocking fetches are profiled in the executor thread that runs them, while
+    address matching, the listener fan-out and the batched state writes (which
+    evaluate every entity property) are profiled on the event loop. The report
+    is written to the config directory once every coordinator completed its
+    cycles and the state writes they caused are done. Coordinators shutting
+    down count as done, and a deadline past the expected cycles finishes the
+    profile with what was measured, so a profile always ends.
+    """
+
+    hass: HomeAssistant
+    coordinators: list
+    cycles: int
+    budget: float
+    phases: dict[tuple[str, str], PhaseTiming] = field(default_factory=dict)
+    slow_getters: list[SlowGetter] = field(default_factory=list)
+    getter_count: int = 0
+    unprofiled: int = 0
+    incomplete: dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        """Initialize the profiling state."""
+        self._loop_profile = cProfile.Profile()
+        self._executor_profiles: list[cProfile.Profile] = []
+        self._remaining = {coordinator.name: self.cycles for coordinator in self.coordinators}
+        self._started_tracemalloc = False
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._finished = False
+        self._cancel_deadline: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Attach to the coordinators and start tracing allocations, at most one profile at a time."""
+        self.hass.data[DATA_PROFILER] = self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._snapshot = tracemalloc.take_snapshot()
+        for coordinator in self.coordinators:
+            coordinator.profiler = self
+        async_get_state_writer(self.hass).profiler = self
+        deadline = self.cycles * max(coordinator.update_interval.total_seconds() for coordinator in self.coordinators)
+        self._cancel_deadline = async_call_later(
+            self.hass,
+            deadline + DEFAULT_PROFILE_DEADLINE_SLACK,
+            HassJob(self._async_deadline, f"{DOMAIN} profile deadline", cancel_on_shutdown=True),
+        )
+
+    async def _async_deadline(self, _now: datetime) -> None:
+        """Finish a profile whose cycles did not all complete in time."""
+        self._cancel_deadline = None
+        _LOGGER.warning("Enea Outages profile finished at its deadline, cycles missing: %s", self._remaining)
+        await self.async_finish()
+
+    @contextmanager
+    def phase(self, coordinator: Any, name: str) -> Iterator[None]:
+        """Measure the wall time of a phase of an update cycle."""
+        with self._timed(coordinator.name, name):
+            yield
+
+    @contextmanager
+    def _timed(self, name: str, phase: str) -> Iterator[None]:
+        """Add the wall time of a section to a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.setdefault((name, phase), PhaseTiming()).add(time.perf_counter() - start)
+
+    @contextmanager
+    def profile_writes(self) -> Iterator[None]:
+        """Profile a batch of entity state writes, which renders every entity property."""
+        with self._timed("state writes", "write"), self.profile_loop():
+            yield
+
+    @contextmanager
+    def profile_loop(self) -> Iterator[None]:
+        """Profile a synchronous section running on the event loop, unless a fetch is being profiled."""
+        with _exclusive_profile(self._loop_profile) as profiling:
+            if not profiling:
+                self.unprofiled += 1
+            yield
+
+    def wrap_job(self, target: Callable[[], Any]) -> Callable[[], Any]:
+        """Wrap an executor job so it is profiled in its own thread, unless another profile is active."""
+
+        def _profiled_job() -> Any:
+            profile = cProfile.Profile()
+            with _exclusive_profile(profile) as profiling:
+                if profiling:
+                    self._executor_profiles.append(profile)
+                else:
+                    self.unprofiled += 1
+                return target()
+
+        return _profiled_job
+
+    def time_getters(self, entity: Entity, names: tuple[str, ...]) -> None:
+        """Evaluate property getters of an entity and flag those over the budget."""
+        for name in names:
+            start = time.perf_counter()
+            getattr(entity, name)
+            duration = time.perf_counter() - start
+            self.getter_count += 1
+            if duration > self.budget:
+                self.slow_getters.append(SlowGetter(entity.entity_id, name, duration))
+
+    @callback
+    def async_cycle_done(self, coordinator: Any) -> None:
+        """Count a completed update cycle and finish once all coordinators are done."""
+        if coordinator.name not in self._remaining:
+            return
+        self._remaining[coordinator.name] -= 1
+        if self._remaining[coordinator.name] > 0:
+            return
+        self._async_coordinator_done(coordinator)
+
+    @callback
+    def async_coordinator_shutdown(self, coordinator: Any) -> None:
+        """Stop waiting for the cycles of a coordinator that shut down."""
+        if coordinator.name in self._remaining:
+            _LOGGER.debug("%s shut down while profiled", coordinator.name)
+            self._async_coordinator_done(coordinator)
+
+    @callback
+    def _async_coordinator_done(self, coordinator: Any) -> None:
+        """Detach from a coordinator and finish once none is left."""
+        self._remaining.pop(coordinator.name)
+        if coordinator.profiler is self:
+            coordinator.profiler = None
+        if not self._remaining:
+            self.hass.async_create_task(self.async_finish())
+
+    async def async_finish(self) -> str | None:
+        """Stop profiling and write the report to the config directory, once."""
+        if self._finished:
+            return None
+        self._finished = True
+        if self._cancel_deadline is not None:
+            self._cancel_deadline()
+            self._cancel_deadline = None
+        self.incomplete = dict(self._remaining)
+        for coordinator in self.coordinators:
+            if coordinator.profiler is self:
+                coordinator.profiler = None
+        # Entities render in the state writes following the last cycle
+        writer = async_get_state_writer(self.hass)
+        await writer.async_wait_idle()
+        if writer.profiler is self:
+            writer.profiler = None
+
+        allocations: list[tracemalloc.StatisticDiff] = []
+        if self._snapshot is not None and tracemalloc.is_tracing():
+            allocations = tracemalloc.take_snapshot().compare_to(self._snapshot, "lineno")
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        if self.hass.data.get(DATA_PROFILER) is self:
+            del self.hass.data[DATA_PROFILER]
+
+        path = self.hass.config.path(f"enea_outages_profile_{dt_util.now().strftime('%Y%m%d_%H%M%S')}.txt")
+        report = self._render(allocations)
+        await self.hass.async_add_executor_job(_write_report, path, report)
+        _LOGGER.info("Enea Outages profile written to %s", path)
+        return path
+
+    def _render(self, allocations: list[tracemalloc.StatisticDiff]) -> str:
+        """Render the collected measurements as a text report."""
+        out = io.StringIO()
+        out.write(f"Enea Outages profile, {self.cycles} cycle(s), getter budget {self.budget * 1000:.1f} ms\n")
+        out.write(f"Sections left out while another profile was active: {self.unprofiled}\n")
+        if self.incomplete:
+            missing = ", ".join(f"{name}={cycles}" for name, cycles in sorted(self.incomplete.items()))
+            out.write(f"Finished at the deadline, cycles missing: {missing}\n")
+        out.write("\n")
+
+        out.write("== Phases (wall time) ==\n")
+        for (name, phase), timing in sorted(self.phases.items()):
+            out.write(
+                f"{name:<40} {phase:<10} calls={timing.calls:<4} total={timing.total * 1000:.2f} ms"
+                f" max={timing.longest * 1000:.2f} ms\n"
+            )
+
+        out.write(f"\n== Property getters over budget ({len(self.slow_getters)} of {self.getter_count}) ==\n")
+        for getter in sorted(self.slow_getters, key=lambda g: g.duration, reverse=True):
+            out.write(f"{getter.entity_id}.{getter.name}: {getter.duration * 1000:.2f} ms\n")
+
+        out.write("\n== Event loop (matching, listeners and state writes) ==\n")
+        _write_stats(out, [self._loop_profile])
+
+        out.write("\n== Executor (fetching and parsing) ==\n")
+        metrics = async_get_executor(self.hass).metrics
+        out.write(" ".join(f"{key}={value}" for key, value in metrics.items()) + "\n\n")
+        _write_stats(out, self._executor_profiles)
+
+        out.write("\n== Allocations since start ==\n")
+        for stat in allocations[:REPORT_TOP_ALLOCATIONS]:
+            out.write(f"{stat}\n")
+        return out.getvalue()
+
+
+def _write_stats(out: io.StringIO, profiles: list[cProfile.Profile]) -> None:
+    """Write the top functions of the merged profiles by cumulative time."""
+    stats: pstats.Stats | None = None
+    for profile in profiles:
+        try:
+            if stats is None:
+                stats = pstats.Stats(profile, stream=out)
+            else:
+                stats.add(profile)
+        except TypeError:
+            # The profile never ran anything
+            continue
+    if stats is None:
+        out.write("(no samples)\n")
+        return
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_TOP_FUNCTIONS)
+
+
+def _write_report(path: str, report: str) -> None:
+    """Write the report file."""
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(report)
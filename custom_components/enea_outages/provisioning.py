@@ -0,0 +1,59 @@
+"""Bulk import of Enea Outages entries from configuration.yaml."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from itertools import groupby
+from typing import Any
+
+from enea_outages.client import EneaOutagesClient
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_REGION, CONF_STREET
+from .executor import async_get_executor
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_import_locations(hass: HomeAssistant, locations: list[dict[str, Any]]) -> None:
+    """Create an entry for each configured location not set up yet.
+
+    The locations are checked against a single fetch of the region catalogue.
+    Entries of one region are created one after another, so the first sets up
+    the region coordinators and the others reuse their warm data, while
+    regions are imported side by side.
+    """
+    try:
+        available_regions = set(
+            await async_get_executor(hass).async_run(EneaOutagesClient().get_available_regions, sheddable=False)
+        )
+    except Exception as err:
+        _LOGGER.error("Failed to get available regions, not importing %d locations: %s", len(locations), err)
+        return
+
+    valid = []
+    for location in locations:
+        if location[CONF_REGION] in available_regions:
+            valid.append(location)
+        else:
+            _LOGGER.error("Not importing %s, %s: unknown region", location[CONF_REGION], location[CONF_STREET])
+
+    valid.sort(key=lambda location: location[CONF_REGION])
+    await asyncio.gather(
+        *(
+            _async_import_region(hass, list(region_locations))
+            for _, region_locations in groupby(valid, key=lambda location: location[CONF_REGION])
+        )
+    )
+
+
+async def _async_import_region(hass: HomeAssistant, locations: list[dict[str, Any]]) -> None:
+    """Import the locations of one region one after another."""
+    for location in locations:
+        await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_IMPORT},
+            data={CONF_REGION: location[CONF_REGION], CONF_STREET: location[CONF_STREET]},
+        )
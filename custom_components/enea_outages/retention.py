@@ -0,0 +1,52 @@
+"""Sliding window of live and upcoming outages, evicting those that have ended."""
+
+from __future__ import annotations
+
+import bisect
+from datetime import datetime
+
+from enea_outages.models import Outage
+
+
+def _end(outage: Outage) -> datetime:
+    """Return the sort key of an outage, outages without an end coming last."""
+    return outage.end_time or datetime.max
+
+
+class SlidingWindow:
+    """Outages ordered by end time, so those that ended are always a prefix.
+
+    Ingesting a snapshot sorts it once and drops what already ended. Later
+    evictions find the ended prefix by bisection and keep the rest, so the
+    work stays proportional to the live outages rather than to everything
+    the API returned.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty window."""
+        self.outages: list[Outage] = []
+        self._ends: list[datetime] = []
+
+    def replace(self, outages: list[Outage], now: datetime) -> list[Outage]:
+        """Replace the window with a snapshot, returning its live and upcoming outages."""
+        ordered = sorted(outages, key=_end)
+        ends = [_end(outage) for outage in ordered]
+        position = bisect.bisect_left(ends, now)
+        self.outages, self._ends = ordered[position:], ends[position:]
+        return self.outages
+
+    def evict(self, now: datetime) -> bool:
+        """Drop the outages that ended before now, returning whether any did."""
+        position = bisect.bisect_left(self._ends, now)
+        if not position:
+            return False
+        # New lists, so holders of the previous snapshot keep seeing it unchanged
+        self.outages, self._ends = self.outages[position:], self._ends[position:]
+        return True
+
+    @property
+    def next_expiry(self) -> datetime | None:
+        """Return when the first outage of the window ends, if any ends."""
+        if not self._ends or self._ends[0] == datetime.max:
+            return None
+        return self._ends[0]
@@ -3,29 +3,114 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Callable
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
 
 from enea_outages.models import Outage, OutageType
-from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util, slugify
 
 from .const import (
     DOMAIN,
     CONF_REGION,
-    CONF_STREET,
     ATTR_DESCRIPTION,
     ATTR_START_TIME,
     ATTR_END_TIME,
+    ATTR_STREETS,
+    MAX_REGION_STREETS,
+)
+from .aggregate import RegionSummary
+from .entity import (
+    address_device_info,
+    async_claim_region_entities,
+    async_track_matched_addresses,
+    entry_addresses,
+    entry_device_info,
+    entry_proximity,
+    region_device_info,
 )
+from .fanout import async_get_state_writer
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True, kw_only=True)
+class EneaOutagesRegionSensorEntityDescription(SensorEntityDescription):
+    """Describes a region sensor reading one figure of the region summary."""
+
+    outage_type: OutageType
+    value_fn: Callable[[RegionSummary], Any]
+
+
+def _local(moment: datetime | None) -> datetime | None:
+    """Return a naive local outage time as an aware datetime."""
+    return moment.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE) if moment else None
+
+
+REGION_SENSORS: tuple[EneaOutagesRegionSensorEntityDescription, ...] = (
+    EneaOutagesRegionSensorEntityDescription(
+        key="region_planned_outages_count",
+        translation_key="region_planned_outages_count",
+        icon="mdi:power-off",
+        state_class=SensorStateClass.MEASUREMENT,
+        outage_type=OutageType.PLANNED,
+        value_fn=lambda summary: summary.count,
+    ),
+    EneaOutagesRegionSensorEntityDescription(
+        key="region_unplanned_outages_count",
+        translation_key="region_unplanned_outages_count",
+        icon="mdi:power-off",
+        state_class=SensorStateClass.MEASUREMENT,
+        outage_type=OutageType.UNPLANNED,
+        value_fn=lambda summary: summary.count,
+    ),
+    EneaOutagesRegionSensorEntityDescription(
+        key="region_planned_affected_streets",
+        translation_key="region_planned_affected_streets",
+        icon="mdi:road-variant",
+        state_class=SensorStateClass.MEASUREMENT,
+        outage_type=OutageType.PLANNED,
+        value_fn=lambda summary: len(summary.streets),
+    ),
+    EneaOutagesRegionSensorEntityDescription(
+        key="region_unplanned_affected_streets",
+        translation_key="region_unplanned_affected_streets",
+        icon="mdi:road-variant",
+        state_class=SensorStateClass.MEASUREMENT,
+        outage_type=OutageType.UNPLANNED,
+        value_fn=lambda summary: len(summary.streets),
+    ),
+    EneaOutagesRegionSensorEntityDescription(
+        key="region_next_planned_start",
+        translation_key="region_next_planned_start",
+        icon="mdi:calendar-clock",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        outage_type=OutageType.PLANNED,
+        value_fn=lambda summary: _local(summary.next_start),
+    ),
+    EneaOutagesRegionSensorEntityDescription(
+        key="region_latest_restoration",
+        translation_key="region_latest_restoration",
+        icon="mdi:power-plug",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        outage_type=OutageType.UNPLANNED,
+        value_fn=lambda summary: _local(summary.latest_end),
+    ),
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -33,7 +118,8 @@ async def async_setup_entry(
 ) -> None:
     """Set up the sensor platform."""
 
-    street = config_entry.data.get(CONF_STREET)
+    addresses = entry_addresses(config_entry)
+    near = entry_proximity(hass, config_entry)
 
     # Get the dictionary of coordinators for this entry
     entry_coordinators = hass.data[DOMAIN][config_entry.entry_id]
@@ -53,7 +139,8 @@ async def async_setup_entry(
                 translation_key="planned_outages_count",
                 icon="mdi:power-off",
             ),
-            street,
+            addresses,
+            near,
         )
     )
 
@@ -68,7 +155,8 @@ async def async_setup_entry(
                 translation_key="unplanned_outages_count",
                 icon="mdi:power-off",
             ),
-            street,
+            addresses,
+            near,
         )
     )
 
@@ -83,7 +171,8 @@ async def async_setup_entry(
                 translation_key="planned_outages_summary",
                 icon="mdi:calendar-clock",
             ),
-            street,
+            addresses,
+            near,
         )
     )
 
@@ -98,17 +187,65 @@ async def async_setup_entry(
                 translation_key="unplanned_outages_summary",
                 icon="mdi:alert-outline",
             ),
-            street,
+            addresses,
+            near,
         )
     )
 
     async_add_entities(entities)
 
+    # Region-wide sensors, added by a single entry of the region
+    async_claim_region_entities(
+        hass,
+        config_entry,
+        async_add_entities,
+        lambda: [
+            EneaOutagesRegionSensor(entry_coordinators[description.outage_type], description)
+            for description in REGION_SENSORS
+        ],
+    )
+
+    def _entities_for_address(address: str) -> list[SensorEntity]:
+        """Create the per-address count sensors."""
+        address_key = f"{config_entry.entry_id}_{slugify(address)}"
+        device_info = address_device_info(config_entry, address)
+        return [
+            EneaOutagesCountSensor(
+                planned_coordinator,
+                config_entry,
+                OutageType.PLANNED,
+                SensorEntityDescription(
+                    key=f"{address_key}_planned_outages_count",
+                    translation_key="planned_outages_count",
+                    icon="mdi:power-off",
+                ),
+                [address],
+                device_info=device_info,
+            ),
+            EneaOutagesCountSensor(
+                unplanned_coordinator,
+                config_entry,
+                OutageType.UNPLANNED,
+                SensorEntityDescription(
+                    key=f"{address_key}_unplanned_outages_count",
+                    translation_key="unplanned_outages_count",
+                    icon="mdi:power-off",
+                ),
+                [address],
+                device_info=device_info,
+            ),
+        ]
+
+    async_track_matched_addresses(
+        config_entry, [planned_coordinator, unplanned_coordinator], async_add_entities, _entities_for_address
+    )
+
 
 class EneaOutagesBaseSensor(CoordinatorEntity, SensorEntity):
     """Base class for Enea Outages sensors."""
 
     _attr_has_entity_name = True
+    _profiled_properties = ("_outages_data", "native_value", "extra_state_attributes")
 
     def __init__(
         self,
@@ -116,40 +253,42 @@ class EneaOutagesBaseSensor(CoordinatorEntity, SensorEntity):
         config_entry: ConfigEntry,
         outage_type: OutageType,
         entity_description: SensorEntityDescription,
-        street: str | None,
+        addresses: list[str],
+        near: tuple[float, float, float] | None = None,
+        device_info: DeviceInfo | None = None,
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator_for_outage_type)  # Pass the coordinator here
         self.entity_description = entity_description
         self._config_entry = config_entry
         self._outage_type = outage_type
-        self._street = street
+        self._addresses = addresses
+        self._near = near
         self._region = config_entry.data[CONF_REGION]
 
         self._attr_unique_id = f"{config_entry.entry_id}_{entity_description.key}"
 
-        device_name = f"Enea Outages ({self._region}{' - ' + self._street if self._street else ''})"
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, config_entry.entry_id)},
-            name=device_name,
-            model="Enea Outages Monitor",
-            manufacturer="Enea Operator",
-        )
+        # The address list stays out of the name, it changes with the options and can grow long
+        self._attr_device_info = device_info or entry_device_info(config_entry)
 
     @property
     def _outages_data(self) -> list[Outage]:
         """Return the relevant outages data from the coordinator."""
-        # The coordinator already fetches data for the specific outage type
-        all_outages = self.coordinator.data
-
-        if self._street:
-            return [o for o in all_outages if self._street.lower() in o.description.lower()]
-        return all_outages
+        # The coordinator matches all watched addresses once per update
+        return self.coordinator.outages_for(self._addresses, self._near)
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        self.async_write_ha_state()
+        if (profiler := self.coordinator.profiler) is not None:
+            profiler.time_getters(self, self._profiled_properties)
+        # Write once per tick, however many coordinators dirtied the entity
+        async_get_state_writer(self.hass).async_schedule(self)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """When entity will be removed from hass."""
+        await super().async_will_remove_from_hass()
+        async_get_state_writer(self.hass).async_discard(self)
 
 
 class EneaOutagesCountSensor(EneaOutagesBaseSensor):
@@ -168,10 +307,9 @@ class EneaOutagesCountSensor(EneaOutagesBaseSensor):
 
         # Sort and limit outages to prevent database overload
         outages = self._outages_data
+        # Unplanned outages are already ordered by end time at ingestion
         if self._outage_type == OutageType.PLANNED:
             outages.sort(key=lambda o: o.start_time if o.start_time else datetime.max)
-        else:  # Unplanned
-            outages.sort(key=lambda o: o.end_time if o.end_time else datetime.max)
 
         for outage in outages[:10]:
             outages_list.append(
@@ -182,6 +320,7 @@ class EneaOutagesCountSensor(EneaOutagesBaseSensor):
                 }
             )
         attrs["outages"] = outages_list
+        attrs.update(self.coordinator.freshness_attributes)
         return attrs
 
 
@@ -203,8 +342,7 @@ class EneaOutagesSummarySensor(EneaOutagesBaseSensor):
             start_time_str = next_outage.start_time.strftime("%Y-%m-%d %H:%M") if next_outage.start_time else "Nieznany"
             end_time_str = next_outage.end_time.strftime("%H:%M") if next_outage.end_time else "Nieznany"
             return f"Od: {start_time_str} do: {end_time_str} ({next_outage.description})"
-        else:  # Unplanned
-            outages.sort(key=lambda o: o.end_time if o.end_time else datetime.max)
+        else:  # Unplanned, already ordered by end time at ingestion
             current_outage = outages[0]
             end_time_str = current_outage.end_time.strftime("%Y-%m-%d %H:%M") if current_outage.end_time else "Nieznany"
             return f"Do: {end_time_str} ({current_outage.description})"
@@ -217,10 +355,9 @@ class EneaOutagesSummarySensor(EneaOutagesBaseSensor):
 
         # Sort and limit outages to prevent database overload
         outages = self._outages_data
+        # Unplanned outages are already ordered by end time at ingestion
         if self._outage_type == OutageType.PLANNED:
             outages.sort(key=lambda o: o.start_time if o.start_time else datetime.max)
-        else:  # Unplanned
-            outages.sort(key=lambda o: o.end_time if o.end_time else datetime.max)
 
         for outage in outages[:10]:
             outages_list.append(
@@ -231,4 +368,48 @@ class EneaOutagesSummarySensor(EneaOutagesBaseSensor):
                 }
             )
         attrs["outages"] = outages_list
+        attrs.update(self.coordinator.freshness_attributes)
+        return attrs
+
+
+class EneaOutagesRegionSensor(CoordinatorEntity, SensorEntity):
+    """Sensor reporting a figure over all outages of a region.
+
+    The figures are computed by the coordinator once per update, so the
+    sensor only reads them, and its unique ID is keyed by the region rather
+    than by the entry hosting it.
+    """
+
+    _attr_has_entity_name = True
+    entity_description: EneaOutagesRegionSensorEntityDescription
+
+    def __init__(self, coordinator, entity_description: EneaOutagesRegionSensorEntityDescription) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self.entity_description = entity_description
+        self._attr_unique_id = f"{DOMAIN}_{slugify(coordinator.region)}_{entity_description.key}"
+        self._attr_device_info = region_device_info(coordinator.region)
+
+    @property
+    def native_value(self) -> Any:
+        """Return the figure from the region summary."""
+        return self.entity_description.value_fn(self.coordinator.summary)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        attrs = {}
+        if self.entity_description.key.endswith("_affected_streets"):
+            attrs[ATTR_STREETS] = list(self.coordinator.summary.streets[:MAX_REGION_STREETS])
+        attrs.update(self.coordinator.freshness_attributes)
         return attrs
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        async_get_state_writer(self.hass).async_schedule(self)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """When entity will be removed from hass."""
+        await super().async_will_remove_from_hass()
+        async_get_state_writer(self.hass).async_discard(self)
@@ -0,0 +1,58 @@
+"""Spatial grid index used for proximity matching."""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Hashable
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Return the great-circle distance between two points in kilometers."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class GridIndex:
+    """Bucket points into fixed-size latitude/longitude cells.
+
+    A radius query only visits the cells overlapping the bounding box of the
+    circle, then checks the exact distance of the points found there.
+    """
+
+    def __init__(self, cell_size: float = 0.05) -> None:
+        """Initialize the index with the cell size in degrees."""
+        self.cell_size = cell_size
+        self._cells: dict[tuple[int, int], list[tuple[float, float, Hashable]]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed points."""
+        return sum(len(points) for points in self._cells.values())
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        """Return the cell containing a point."""
+        return math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size)
+
+    def insert(self, item: Hashable, latitude: float, longitude: float) -> None:
+        """Add an item at a point."""
+        self._cells.setdefault(self._cell(latitude, longitude), []).append((latitude, longitude, item))
+
+    def query_radius(self, latitude: float, longitude: float, radius_km: float) -> set[Hashable]:
+        """Return the items within a radius of a point."""
+        dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        # Guard against the poles, where a degree of longitude shrinks to nothing
+        dlon = dlat / max(math.cos(math.radians(latitude)), 0.01)
+        min_row, min_col = self._cell(latitude - dlat, longitude - dlon)
+        max_row, max_col = self._cell(latitude + dlat, longitude + dlon)
+
+        found: set[Hashable] = set()
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                for point_lat, point_lon, item in self._cells.get((row, col), ()):
+                    if item not in found and haversine_km(latitude, longitude, point_lat, point_lon) <= radius_km:
+                        found.add(item)
+        return found
@@ -0,0 +1,136 @@
+"""Street name index used to suggest and check addresses in the config flows."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from enea_outages.models import Outage
+
+from .const import MIN_STREET_PREFIX
+from .matching import normalize_address
+
+# Markers preceding a street name in outage descriptions
+STREET_MARKERS = ("ul.", "al.", "os.", "pl.")
+
+# Key of the node holding the display name of a complete street
+_END = ""
+
+
+def _strip_marker(key: str) -> str:
+    """Drop a leading street marker from a normalized address."""
+    for marker in STREET_MARKERS:
+        if key.startswith(marker):
+            return key[len(marker) :].lstrip()
+    return key
+
+
+def street_names(outages: Iterable[Outage]) -> set[str]:
+    """Return the street names mentioned in outage descriptions.
+
+    A name is the run of words following a marker such as "ul.", up to the
+    first house number or separator.
+    """
+    names: set[str] = set()
+    for outage in outages:
+        words: list[str] | None = None
+        for token in [*outage.description.split(), ","]:
+            if token.lower() in STREET_MARKERS:
+                words = []
+                continue
+            if words is None:
+                continue
+            word = token.rstrip(",;")
+            if word and not word[0].isdigit():
+                words.append(word)
+            if word != token or not word or word[0].isdigit():
+                # A house number or separator ends the name
+                if words:
+                    names.add(" ".join(words))
+                words = None
+    return names
+
+
+class StreetIndex:
+    """Prefix trie over normalized street names.
+
+    Completing a prefix or checking an address walks one node per character,
+    however many names are indexed.
+    """
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        """Initialize the index."""
+        self._root: dict[str, dict] = {}
+        self._size = 0
+        for name in names:
+            self.add(name)
+
+    def __len__(self) -> int:
+        """Return the number of indexed names."""
+        return self._size
+
+    def add(self, name: str) -> None:
+        """Index a name."""
+        key = _strip_marker(normalize_address(name))
+        if not key:
+            return
+        node = self._root
+        for char in key:
+            node = node.setdefault(char, {})
+        if _END not in node:
+            self._size += 1
+            node[_END] = name
+
+    def complete(self, prefix: str = "", limit: int | None = None) -> list[str]:
+        """Return the names starting with a prefix, in alphabetical order."""
+        if (node := self._node(prefix)) is None:
+            return []
+        names: list[str] = []
+        stack = [node]
+        while stack and (limit is None or len(names) < limit):
+            node = stack.pop()
+            if _END in node:
+                names.append(node[_END])
+            stack.extend(node[char] for char in sorted(node, reverse=True) if char != _END)
+        return names
+
+    def _node(self, address: str) -> dict | None:
+        """Return the trie node of a normalized address, None if no name starts with it."""
+        node = self._root
+        for char in _strip_marker(normalize_address(address)):
+            if (node := node.get(char)) is None:
+                return None
+        return node
+
+    def knows(self, address: str) -> bool:
+        """Return whether an address is a known name or a long enough prefix of one.
+
+        Prefixes shorter than MIN_STREET_PREFIX are not known, a single letter
+        would otherwise pass the typo check. A name followed by a house number
+        is not known either: addresses match outage descriptions as substrings,
+        and descriptions list the numbers apart from the name, as in
+        "ul. Testowa 1, 3".
+        """
+        if (node := self._node(address)) is None:
+            return False
+        return _END in node or len(_strip_marker(normalize_address(address))) >= MIN_STREET_PREFIX
+
+    def has_house_number(self, address: str) -> bool:
+        """Return whether an address is a known name followed by a house number."""
+        name, _, number = address.strip().rpartition(" ")
+        if not name or not number[:1].isdigit() or self.knows(address):
+            return False
+        node = self._node(name)
+        return node is not None and _END in node
+
+
+def build_street_index(outage_lists: Iterable[list[Outage]]) -> StreetIndex:
+    """Build the index of a region from its cached outages.
+
+    Gazetteer localities are left out: descriptions name the locality of
+    every outage, so a town picked as a street would match all of them.
+    """
+    index = StreetIndex()
+    for outages in outage_lists:
+        for name in street_names(outages):
+            index.add(name)
+    return index
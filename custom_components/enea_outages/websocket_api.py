@@ -0,0 +1,139 @@
+"""Websocket API streaming Enea outages to dashboards."""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any
+
+import voluptuous as vol
+from enea_outages.models import Outage, OutageType
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    ATTR_DESCRIPTION,
+    ATTR_END_TIME,
+    ATTR_OUTAGE_TYPE,
+    ATTR_OUTAGE_TYPES,
+    ATTR_START_TIME,
+    CONF_REGION,
+    DOMAIN,
+)
+from .coordinator import EneaOutagesOutageTypeCoordinator, async_get_registry
+from .entity import entry_addresses, entry_proximity
+
+OUTAGE_TYPES = {"planned": OutageType.PLANNED, "unplanned": OutageType.UNPLANNED}
+
+
+@callback
+def async_setup(hass: HomeAssistant) -> None:
+    """Register the websocket commands."""
+    websocket_api.async_register_command(hass, websocket_subscribe)
+
+
+def outage_key(outage_type: str, outage: Outage) -> str:
+    """Return a key identifying an outage across updates.
+
+    The end time is left out, so an outage whose end is moved is reported as
+    changed rather than removed and added again.
+    """
+    start_time = outage.start_time.isoformat() if outage.start_time else ""
+    digest = hashlib.sha1(f"{outage_type}|{start_time}|{outage.description}".encode()).hexdigest()
+    return digest[:16]
+
+
+def _serialize(outage_type: str, outage: Outage) -> dict[str, Any]:
+    """Return an outage in the format of the sensor attributes."""
+    return {
+        ATTR_OUTAGE_TYPE: outage_type,
+        ATTR_DESCRIPTION: outage.description,
+        ATTR_START_TIME: outage.start_time.isoformat() if outage.start_time else None,
+        ATTR_END_TIME: outage.end_time.isoformat() if outage.end_time else None,
+    }
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/subscribe",
+        vol.Exclusive("entry_id", "source"): str,
+        vol.Exclusive(CONF_REGION, "source"): str,
+        vol.Optional(ATTR_OUTAGE_TYPES, default=list(OUTAGE_TYPES)): vol.All(
+            [vol.In(list(OUTAGE_TYPES))], vol.Length(min=1)
+        ),
+    }
+)
+@callback
+def websocket_subscribe(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    """Send a snapshot of the outages, then the changes as the coordinators update.
+
+    With an entry_id the outages are filtered like the entry sensors, by its
+    addresses or proximity. With a region every outage of the region is sent.
+    """
+    addresses: list[str] = []
+    near: tuple[float, float, float] | None = None
+    if "entry_id" in msg:
+        coordinators_by_type = hass.data.get(DOMAIN, {}).get(msg["entry_id"])
+        if coordinators_by_type is None:
+            connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry not loaded")
+            return
+        entry = hass.config_entries.async_get_entry(msg["entry_id"])
+        addresses = entry_addresses(entry)
+        near = entry_proximity(hass, entry)
+    elif CONF_REGION in msg:
+        registry = async_get_registry(hass)
+        coordinators_by_type = {
+            outage_type: coordinator
+            for outage_type in OUTAGE_TYPES.values()
+            if (coordinator := registry.get(msg[CONF_REGION], outage_type)) is not None
+        }
+        if not coordinators_by_type:
+            connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Region not monitored")
+            return
+    else:
+        connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, "Either entry_id or region is required")
+        return
+
+    coordinators: dict[str, EneaOutagesOutageTypeCoordinator] = {
+        name: coordinators_by_type[outage_type]
+        for name, outage_type in OUTAGE_TYPES.items()
+        if name in msg[ATTR_OUTAGE_TYPES] and outage_type in coordinators_by_type
+    }
+    sent: dict[str, dict[str, Any]] = {}
+
+    def _current() -> dict[str, dict[str, Any]]:
+        """Return the selected outages keyed by outage_key."""
+        current: dict[str, dict[str, Any]] = {}
+        for name, coordinator in coordinators.items():
+            if coordinator.data is None:
+                continue
+            for outage in coordinator.outages_for(addresses, near):
+                current.setdefault(outage_key(name, outage), _serialize(name, outage))
+        return current
+
+    @callback
+    def _async_send_changes() -> None:
+        """Send the outages added, removed or changed since the last message."""
+        current = _current()
+        added = {key: outage for key, outage in current.items() if key not in sent}
+        changed = {key: outage for key, outage in current.items() if key in sent and sent[key] != outage}
+        removed = [key for key in sent if key not in current]
+        if not (added or changed or removed):
+            return
+        sent.clear()
+        sent.update(current)
+        connection.send_message(
+            websocket_api.event_message(msg["id"], {"added": added, "changed": changed, "removed": removed})
+        )
+
+    unsubs = [coordinator.async_add_listener(_async_send_changes) for coordinator in coordinators.values()]
+
+    @callback
+    def _async_unsubscribe() -> None:
+        """Stop listening to the coordinators."""
+        for unsub in unsubs:
+            unsub()
+
+    connection.subscriptions[msg["id"]] = _async_unsubscribe
+    connection.send_result(msg["id"])
+    sent.update(_current())
+    connection.send_message(websocket_api.event_message(msg["id"], {"snapshot": dict(sent)}))
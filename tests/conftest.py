@@ -3,6 +3,8 @@
 import pytest
 from unittest.mock import patch
 
+from enea_server import EneaStandInServer
+
 # This fixture enables loading custom components from the custom_components folder
 pytest_plugins = "pytest_homeassistant_custom_component"
 
@@ -10,6 +12,22 @@ pytest_plugins = "pytest_homeassistant_custom_component"
 def pytest_addoption(parser):
     """Add options to pytest."""
     parser.addoption("--internet-off", action="store_true", default=False)
+    parser.addoption("--soak", action="store_true", default=False, help="run the long soak tests")
+
+
+def pytest_configure(config):
+    """Register custom markers."""
+    config.addinivalue_line("markers", "soak: long running soak test against the Enea stand-in server")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip soak tests unless they are requested."""
+    if config.getoption("--soak"):
+        return
+    skip_soak = pytest.mark.skip(reason="need --soak option to run")
+    for item in items:
+        if "soak" in item.keywords:
+            item.add_marker(skip_soak)
 
 
 # This fixture is used to prevent HomeAssistant from attempting to create and dismiss persistent
@@ -48,3 +66,13 @@ def auto_mock_socket(socket_enabled):
 def auto_enable_custom_integrations(hass, enable_custom_integrations, mock_zeroconf):
     """Enable custom integrations and mock zeroconf."""
     yield
+
+
+# This fixture serves synthetic Enea pages locally and points the client at them.
+@pytest.fixture
+def enea_server():
+    """Run the Enea stand-in server for the duration of a test."""
+    server = EneaStandInServer()
+    with patch("enea_outages.client.EneaOutagesClient.BASE_URL", server.start()):
+        yield server
+    server.stop()
@@ -0,0 +1,284 @@
+"""Local stand-in for the Enea Operator outage pages.
+
+The server renders the same markup as https://wylaczenia-eneaoperator.pl/index.php
+for synthetic regions, streets and outages, so tests can run the real HTTP and
+parsing path of `EneaOutagesClient` offline. Latency, HTTP errors, truncated
+bodies and slowly dripped responses can be injected at any time.
+
+It can also be started on its own for manual soak runs:
+
+    python -m tests.enea_server --port 8080 --regions 5 --streets 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PAGE_PLANNED = "unpl"
+PAGE_UNPLANNED = "awarie"
+
+MONTHS = [
+    "stycznia",
+    "lutego",
+    "marca",
+    "kwietnia",
+    "maja",
+    "czerwca",
+    "lipca",
+    "sierpnia",
+    "września",
+    "października",
+    "listopada",
+    "grudnia",
+]
+
+
+@dataclass
+class Faults:
+    """Faults injected into the responses of the stand-in server."""
+
+    latency: float = 0.0  # seconds before the response starts
+    error_rate: float = 0.0  # share of requests answered with `error_status`
+    error_status: int = 503
+    truncate_rate: float = 0.0  # share of bodies cut short of their declared length
+    drip_rate: float = 0.0  # share of bodies sent in small, delayed chunks
+    drip_chunk: int = 512
+    drip_delay: float = 0.01
+
+
+@dataclass
+class SyntheticOutage:
+    """An outage as rendered by the stand-in server."""
+
+    area: str
+    description: str
+    start_time: datetime | None
+    end_time: datetime
+
+
+@dataclass
+class Catalogue:
+    """Deterministic synthetic regions, streets and outages.
+
+    Outages are regenerated for every `refresh` period of the clock passed to
+    `outages`, so data changes over simulated time while staying reproducible
+    for a given seed.
+    """
+
+    regions: int = 5
+    streets_per_region: int = 40
+    outages_per_page: int = 15
+    streets_per_outage: int = 3
+    refresh: timedelta = timedelta(hours=1)
+    seed: int = 0
+    region_names: list[str] = field(init=False)
+
+    def __post_init__(self) -> None:
+        """Generate the region names."""
+        self.region_names = [f"Region {index:02d}" for index in range(self.regions)]
+
+    def streets(self, region: str) -> list[str]:
+        """Return the street names of a region."""
+        index = self.region_names.index(region)
+        return [f"Ulica {index:02d}-{street:03d}" for street in range(self.streets_per_region)]
+
+    def outages(self, region: str, page: str, now: datetime) -> list[SyntheticOutage]:
+        """Return the outages published for a region and page at a point in time."""
+        if region not in self.region_names:
+            return []
+        bucket = int(now.timestamp() // self.refresh.total_seconds())
+        rng = random.Random(f"{self.seed}-{region}-{page}-{bucket}")
+        streets = self.streets(region)
+        base = now.replace(minute=0, second=0, microsecond=0)
+
+        outages = []
+        for index in range(self.outages_per_page):
+            picked = rng.sample(streets, min(self.streets_per_outage, len(streets)))
+            description = f"{region} gm. {region} " + ", ".join(f"ul. {s} {rng.randint(1, 60)}" for s in picked)
+            if page == PAGE_PLANNED:
+                start = (base + timedelta(days=rng.randint(0, 6))).replace(hour=rng.randint(6, 14))
+                end = start + timedelta(hours=rng.randint(1, 8))
+                if end.date() != start.date():
+                    end = start.replace(hour=23, minute=59)
+                outages.append(SyntheticOutage(f"{region} {index}", description, start, end))
+            else:
+                end = base + timedelta(minutes=rng.randint(-60, 360) // 5 * 5)
+                outages.append(SyntheticOutage(f"{region} {index}", description, None, end))
+        return outages
+
+    def render(self, region: str, page: str, now: datetime) -> str:
+        """Render the HTML page the Enea website serves for a region and page."""
+        options = "".join(f'<option value="{escape(name)}">{escape(name)}</option>' for name in self.region_names)
+        blocks = "".join(_render_block(outage) for outage in self.outages(region, page, now))
+        return (
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Wyłączenia</title></head><body>'
+            '<form><select id="oddzial" name="oddzial"><option value="">Wybierz oddział</option>'
+            f"{options}</select></form>"
+            f'<div class="unpl">{blocks}</div></body></html>'
+        )
+
+
+def _polish_date(moment: datetime) -> str:
+    """Format a date the way the Enea pages do."""
+    return f"{moment.day} {MONTHS[moment.month - 1]} {moment.year} r."
+
+
+def _render_block(outage: SyntheticOutage) -> str:
+    """Render a single outage block."""
+    if outage.start_time is not None:
+        when = f"{_polish_date(outage.start_time)} w godz. {outage.start_time:%H:%M} - {outage.end_time:%H:%M}"
+    else:
+        when = f"{_polish_date(outage.end_time)} do godziny {outage.end_time:%H:%M}"
+    return (
+        '<div class="unpl block info">'
+        f'<h4 class="title_">{escape(outage.area)}</h4>'
+        f'<p class="bold subtext">{when}</p>'
+        f'<p class="description">{escape(outage.description)}</p>'
+        "</div>"
+    )
+
+
+class EneaStandInServer:
+    """Threaded HTTP server serving a `Catalogue` with injectable `Faults`."""
+
+    def __init__(
+        self,
+        catalogue: Catalogue | None = None,
+        faults: Faults | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 0,
+    ) -> None:
+        """Initialize the server."""
+        self.catalogue = catalogue or Catalogue()
+        self.faults = faults or Faults()
+        self.requests: Counter[tuple[str, str]] = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        """Return the URL to use as `EneaOutagesClient.BASE_URL`."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/index.php"
+
+    def start(self) -> str:
+        """Start serving in a background thread and return the base URL."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="enea-stand-in", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        """Stop serving and wait for in-flight requests to finish."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _roll(self, rate: float) -> bool:
+        """Decide whether a fault with the given rate applies to a request."""
+        with self._lock:
+            return rate > 0 and self._rng.random() < rate
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        """Build the request handler bound to this server."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                query = parse_qs(urlparse(self.path).query)
+                page = query.get("page", [PAGE_PLANNED])[0]
+                region = query.get("oddzial", [""])[0]
+                faults = server.faults
+                with server._lock:
+                    server.requests[(region, page)] += 1
+
+                if faults.latency:
+                    time.sleep(faults.latency)
+
+                if server._roll(faults.error_rate):
+                    self.send_response(faults.error_status)
+                    self.send_header("Content-Length", "0")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    return
+
+                body = server.catalogue.render(region, page, datetime.now()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                if server._roll(faults.truncate_rate):
+                    # Declare the full length but hang up half way through
+                    self.wfile.write(body[: len(body) // 2])
+                    self.close_connection = True
+                    return
+
+                if server._roll(faults.drip_rate):
+                    for offset in range(0, len(body), faults.drip_chunk):
+                        self.wfile.write(body[offset : offset + faults.drip_chunk])
+                        self.wfile.flush()
+                        time.sleep(faults.drip_delay)
+                    return
+
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                """Keep the test output quiet."""
+
+        return Handler
+
+
+def main() -> None:
+    """Run the stand-in server until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--regions", type=int, default=5)
+    parser.add_argument("--streets", type=int, default=40)
+    parser.add_argument("--outages", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--drip-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = EneaStandInServer(
+        Catalogue(regions=args.regions, streets_per_region=args.streets, outages_per_page=args.outages, seed=args.seed),
+        Faults(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            truncate_rate=args.truncate_rate,
+            drip_rate=args.drip_rate,
+        ),
+        host=args.host,
+        port=args.port,
+        seed=args.seed,
+    )
+    print(f"Serving Enea stand-in on {server.start()}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Fault scenarios replayed against the Enea stand-in server."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from enea_server import Faults
+
+
+@dataclass
+class Step:
+    """Faults applied from a simulated hour onwards."""
+
+    hour: int
+    faults: Faults
+
+
+@dataclass
+class Scenario:
+    """A named script of fault steps over a number of simulated hours."""
+
+    name: str
+    hours: int
+    steps: list[Step]
+
+    def faults_at(self, hour: float) -> Faults:
+        """Return the faults active at a simulated hour."""
+        active = Faults()
+        for step in self.steps:
+            if step.hour <= hour:
+                active = step.faults
+        return active
+
+
+# A healthy day with one long upstream outage, a slow spell, flaky bodies and a recovery
+SOAK_DAY = Scenario(
+    name="soak_day",
+    hours=24,
+    steps=[
+        Step(0, Faults()),
+        Step(4, Faults(error_rate=1.0)),
+        Step(8, Faults()),
+        Step(10, Faults(latency=0.05)),
+        Step(12, Faults(truncate_rate=0.5)),
+        Step(14, Faults(drip_rate=1.0, drip_chunk=256, drip_delay=0.001)),
+        Step(16, Faults(error_rate=0.3, error_status=500)),
+        Step(18, Faults()),
+    ],
+)
+
+# Upstream down for most of the run, to check probing stays throttled
+LONG_OUTAGE = Scenario(
+    name="long_outage",
+    hours=12,
+    steps=[
+        Step(0, Faults()),
+        Step(1, Faults(error_rate=1.0)),
+        Step(11, Faults()),
+    ],
+)
+
+SCENARIOS = {scenario.name: scenario for scenario in (SOAK_DAY, LONG_OUTAGE)}
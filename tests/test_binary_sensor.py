@@ -5,11 +5,15 @@ from unittest.mock import patch
 
 import pytest
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.enea_outages.const import DOMAIN, CONF_REGION, CONF_STREET
 from enea_outages.models import Outage
 
+# Fixture outages are dated relative to now, so they are neither expired nor evicted
+TOMORROW = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
 
 @pytest.fixture
 def mock_get_outages_for_region():
@@ -22,8 +26,8 @@ def mock_get_outages_for_region():
                 Outage(
                     region="Poznań",
                     description="Planned outage street Testowa 1",
-                    start_time=datetime(2025, 12, 1, 8, 0),
-                    end_time=datetime(2025, 12, 1, 16, 0),
+                    start_time=TOMORROW + timedelta(hours=8),
+                    end_time=TOMORROW + timedelta(hours=16),
                 ),
                 Outage(  # Active planned outage
                     region="Poznań",
@@ -79,3 +83,69 @@ async def test_binary_sensor_inactive(hass: HomeAssistant) -> None:
 
         binary_sensor = hass.states.get("binary_sensor.enea_outages_poznan_nooutagesstreet_outage_active")
         assert binary_sensor.state == "off"
+
+
+@pytest.mark.asyncio
+async def test_occupancy_window(hass: HomeAssistant) -> None:
+    """Test the next outage attributes and the check_window service."""
+    now = datetime.now().replace(second=0, microsecond=0)
+    outages = [
+        Outage(
+            region="Poznań",
+            description="ul. Testowa 1",
+            start_time=now + timedelta(hours=2),
+            end_time=now + timedelta(hours=4),
+        ),
+        Outage(
+            region="Poznań",
+            description="ul. Inna 2",
+            start_time=now + timedelta(hours=1),
+            end_time=now + timedelta(hours=5),
+        ),
+    ]
+    with patch("enea_outages.client.EneaOutagesClient.get_outages_for_region", return_value=outages):
+        config_entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_REGION: "Poznań", CONF_STREET: "Testowa"},
+            entry_id="test-occupancy",
+            unique_id="Poznań_Testowa",
+        )
+        config_entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+    # Only the outage on the watched street counts
+    state = hass.states.get("binary_sensor.enea_outages_poznan_testowa_outage_active")
+    assert state.attributes["next_outage_start"] == (now + timedelta(hours=2)).isoformat()
+    assert state.attributes["next_outage_end"] == (now + timedelta(hours=4)).isoformat()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "check_window",
+        {"config_entry_id": "test-occupancy", "duration": "01:30:00"},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["outage"] is False
+    response = await hass.services.async_call(
+        DOMAIN,
+        "check_window",
+        {"config_entry_id": "test-occupancy", "duration": "03:00:00"},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["outage"] is True
+    assert response["outage_minutes"] == 60
+
+    # Windows past the map cannot be answered
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            "check_window",
+            {"config_entry_id": "test-occupancy", "start": now + timedelta(days=4), "duration": "01:00:00"},
+            blocking=True,
+            return_response=True,
+        )
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
@@ -3,11 +3,22 @@
 from unittest.mock import patch
 
 import pytest
+from enea_outages.models import Outage
 from homeassistant import config_entries, data_entry_flow
 from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.enea_outages.const import DOMAIN, CONF_REGION, CONF_STREET
+from custom_components.enea_outages.const import (
+    DOMAIN,
+    CONF_ADDRESS_ENTITIES,
+    CONF_PROXIMITY,
+    CONF_RADIUS,
+    CONF_REGION,
+    CONF_REGION_ENTITIES,
+    CONF_STREET,
+    CONF_STREETS,
+    DEFAULT_RADIUS,
+)
 
 
 @pytest.mark.asyncio
@@ -24,18 +35,16 @@ async def test_form_user_no_street(hass: HomeAssistant) -> None:
             "custom_components.enea_outages.async_setup_entry",
             return_value=True,
         ):
-            result2 = await hass.config_entries.flow.async_configure(
-                result["flow_id"],
-                {
-                    CONF_REGION: "Poznań",
-                    CONF_STREET: "",
-                },
-            )
+            result2 = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_REGION: "Poznań"})
+            assert result2["type"] == data_entry_flow.FlowResultType.FORM
+            assert result2["step_id"] == "street"
+
+            result2 = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_STREET: ""})
             await hass.async_block_till_done()
 
         assert result2["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
         assert result2["title"] == "Poznań"
-        assert mock_client_class.return_value.get_available_regions.call_count == 2
+        assert mock_client_class.return_value.get_available_regions.call_count == 1
 
 
 @pytest.mark.asyncio
@@ -52,19 +61,16 @@ async def test_form_user_with_street(hass: HomeAssistant) -> None:
             "custom_components.enea_outages.async_setup_entry",
             return_value=True,
         ):
+            result2 = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_REGION: "Szczecin"})
             result2 = await hass.config_entries.flow.async_configure(
-                result["flow_id"],
-                {
-                    CONF_REGION: "Szczecin",
-                    CONF_STREET: "Wojska Polskiego",
-                },
+                result["flow_id"], {CONF_STREET: "Wojska Polskiego"}
             )
             await hass.async_block_till_done()
 
         assert result2["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
         assert result2["title"] == "Szczecin, Wojska Polskiego"
         assert result2["data"] == {CONF_REGION: "Szczecin", CONF_STREET: "Wojska Polskiego"}
-        assert mock_client_class.return_value.get_available_regions.call_count == 2
+        assert mock_client_class.return_value.get_available_regions.call_count == 1
 
 
 @pytest.mark.asyncio
@@ -90,10 +96,7 @@ async def test_form_invalid_region(hass: HomeAssistant) -> None:
         with pytest.raises(data_entry_flow.InvalidData):
             await hass.config_entries.flow.async_configure(
                 result["flow_id"],
-                {
-                    CONF_REGION: "Invalid Region",
-                    CONF_STREET: "Some Street",
-                },
+                {CONF_REGION: "Invalid Region"},
             )
 
 
@@ -110,13 +113,94 @@ async def test_form_already_configured(hass: HomeAssistant) -> None:
         mock_client_class.return_value.get_available_regions.return_value = ["Poznań", "Szczecin"]
 
         result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
-        result2 = await hass.config_entries.flow.async_configure(
+        result2 = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_REGION: "Poznań"})
+        result2 = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_STREET: "Testowa"})
+
+        assert result2["type"] == data_entry_flow.FlowResultType.ABORT
+        assert result2["reason"] == "already_configured"
+
+
+@pytest.mark.asyncio
+async def test_options_flow_addresses(hass: HomeAssistant) -> None:
+    """Test the options flow stores a cleaned list of addresses."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_REGION: "Poznań", CONF_STREET: "Testowa"},
+        unique_id="Poznań_Testowa",
+    )
+    config_entry.add_to_hass(hass)
+
+    with patch("custom_components.enea_outages.async_setup_entry", return_value=True):
+        result = await hass.config_entries.options.async_init(config_entry.entry_id)
+        assert result["type"] == data_entry_flow.FlowResultType.FORM
+        assert result["step_id"] == "init"
+
+        result2 = await hass.config_entries.options.async_configure(
             result["flow_id"],
-            {
-                CONF_REGION: "Poznań",
-                CONF_STREET: "Testowa",
-            },
+            {CONF_STREETS: ["Testowa", " Inna ", "", "Testowa", "testowa", "inna  "], CONF_ADDRESS_ENTITIES: True},
         )
+        await hass.async_block_till_done()
 
-        assert result2["type"] == data_entry_flow.FlowResultType.ABORT
-        assert result2["reason"] == "already_configured"
\ No newline at end of file
+    assert result2["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert config_entry.options == {
+        CONF_STREETS: ["Testowa", "Inna"],
+        CONF_ADDRESS_ENTITIES: True,
+        CONF_PROXIMITY: False,
+        CONF_RADIUS: DEFAULT_RADIUS,
+        CONF_REGION_ENTITIES: False,
+    }
+
+
+@pytest.mark.asyncio
+async def test_form_user_unknown_street(hass: HomeAssistant) -> None:
+    """Test a street missing from the cached outages is flagged once, then accepted."""
+    outages = [
+        Outage(region="Poznań", description="Poznań ul. Testowa 1, 3", start_time=None, end_time=None),
+    ]
+    with patch("enea_outages.client.EneaOutagesClient.get_outages_for_region", return_value=outages):
+        config_entry = MockConfigEntry(domain=DOMAIN, data={CONF_REGION: "Poznań", CONF_STREET: ""}, unique_id="Poznań")
+        config_entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+    with patch("custom_components.enea_outages.config_flow.EneaOutagesClient") as mock_client_class:
+        mock_client_class.return_value.get_available_regions.return_value = ["Poznań", "Szczecin"]
+
+        # Streets are suggested for the chosen region only, once it is known
+        result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+        assert CONF_STREET not in result["data_schema"].schema
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_REGION: "Szczecin"})
+        assert result["step_id"] == "street"
+        assert "Testowa" not in result["data_schema"].schema[CONF_STREET].config["options"]
+
+        result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_REGION: "Poznań"})
+        # Cached streets of the region are suggested, localities would match every outage
+        options = result["data_schema"].schema[CONF_STREET].config["options"]
+        assert "Testowa" in options
+        assert "Poznań" not in options
+
+        # A short prefix of a known name is not enough to pass the typo check
+        result2 = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_STREET: "T"})
+        assert result2["type"] == data_entry_flow.FlowResultType.FORM
+        assert result2["errors"] == {CONF_STREET: "unknown_street"}
+
+        result2 = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_STREET: "Testwa"})
+        assert result2["type"] == data_entry_flow.FlowResultType.FORM
+        assert result2["errors"] == {CONF_STREET: "unknown_street"}
+
+        with patch("custom_components.enea_outages.async_setup_entry", return_value=True):
+            result3 = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_STREET: "Testwa"})
+            await hass.async_block_till_done()
+        assert result3["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+
+        # A known street with a house number would never match, even when submitted again
+        result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_REGION: "Poznań"})
+        for _ in range(2):
+            result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_STREET: "ul. Testowa 3"})
+            assert result["type"] == data_entry_flow.FlowResultType.FORM
+            assert result["errors"] == {CONF_STREET: "house_number"}
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,137 @@
+"""Tests for the headless Prometheus exporter."""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+from unittest.mock import patch
+
+import pytest
+from enea_outages.models import Outage, OutageType
+
+from custom_components.enea_outages.daemon import OutageDaemon, parse_timezone, parse_watch
+
+DAEMON = Path(__file__).parent.parent / "custom_components" / "enea_outages" / "daemon.py"
+
+
+async def _get(port: int, path: str) -> tuple[str, str]:
+    """Return the status line and body of a request to the exporter."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = (await reader.read()).decode()
+    writer.close()
+    await writer.wait_closed()
+    head, _, body = response.partition("\r\n\r\n")
+    return head.splitlines()[0], body
+
+
+@pytest.mark.asyncio
+async def test_metrics() -> None:
+    """Test the exporter serves outage gauges and fetch latency histograms."""
+    # Outage times are local to the given zone, whatever the zone of the host
+    timezone = ZoneInfo("Pacific/Kiritimati")
+    now = datetime.now(timezone).replace(tzinfo=None, microsecond=0)
+    outages = {
+        OutageType.PLANNED: [
+            Outage(
+                region="Poznań",
+                description="Poznań ul. Testowa 1",
+                start_time=now - timedelta(hours=1),
+                end_time=now + timedelta(hours=1),
+            ),
+            Outage(
+                region="Poznań",
+                description="Poznań ul. Inna 2",
+                start_time=now + timedelta(days=1),
+                end_time=now + timedelta(days=1, hours=2),
+            ),
+        ],
+        OutageType.UNPLANNED: [],
+    }
+
+    def _get_outages(self, region, outage_type):
+        if region == "Szczecin":
+            raise ConnectionError("Connection error")
+        return outages[outage_type]
+
+    daemon = OutageDaemon({"Poznań": ["Testowa", "Główna"], "Szczecin": []}, timezone=timezone)
+    with patch("enea_outages.client.EneaOutagesClient.get_outages_for_region", _get_outages):
+        for feed in daemon.feeds:
+            await daemon.async_refresh(feed)
+
+    server = await daemon.async_serve("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        status, body = await _get(port, "/metrics")
+        assert status == "HTTP/1.1 200 OK"
+        assert 'enea_outages_outages{region="Poznań",outage_type="planned"} 2' in body
+        assert 'enea_outages_affected_streets{region="Poznań",outage_type="planned"} 2' in body
+        assert 'enea_outages_matched_outages{region="Poznań",outage_type="planned",street="Testowa"} 1' in body
+        assert 'enea_outages_active{region="Poznań",street="Testowa"} 1' in body
+        assert 'enea_outages_active{region="Poznań",street="Główna"} 0' in body
+        next_start = (now + timedelta(days=1)).replace(tzinfo=timezone).timestamp()
+        assert f'enea_outages_next_start_timestamp_seconds{{region="Poznań"}} {next_start}' in body
+        assert 'enea_outages_fetch_duration_seconds_count{region="Poznań",outage_type="planned"} 1' in body
+        assert 'enea_outages_fetch_duration_seconds_bucket{region="Poznań",outage_type="planned",le="+Inf"} 1' in body
+        # A failing region has no outage gauges, only its failures
+        assert 'enea_outages_outages{region="Szczecin"' not in body
+        assert 'enea_outages_fetch_failures_total{region="Szczecin",outage_type="unplanned"} 1' in body
+        assert body.count("# TYPE enea_outages_outages gauge") == 1
+
+        status, _ = await _get(port, "/")
+        assert status == "HTTP/1.1 404 Not Found"
+    finally:
+        server.close()
+        await server.wait_closed()
+        await daemon.async_stop()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_times_out() -> None:
+    """Test a client that never sends its request is dropped without disturbing the others."""
+    daemon = OutageDaemon({"Poznań": []})
+    server = await daemon.async_serve("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        with patch("custom_components.enea_outages.daemon.REQUEST_TIMEOUT", 0.05):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            assert await asyncio.wait_for(reader.read(), 1) == b""
+            writer.close()
+            await writer.wait_closed()
+        status, _ = await _get(port, "/metrics")
+        assert status == "HTTP/1.1 200 OK"
+    finally:
+        server.close()
+        await server.wait_closed()
+        await daemon.async_stop()
+
+
+def test_parse_watch() -> None:
+    """Test parsing of the watched regions and streets."""
+    assert parse_watch("Poznań: Testowa , Inna") == ("Poznań", ["Testowa", "Inna"])
+    assert parse_watch("Szczecin") == ("Szczecin", [])
+
+
+def test_parse_timezone() -> None:
+    """Test parsing of the time zone of the outage times."""
+    assert parse_timezone("Europe/Warsaw") == ZoneInfo("Europe/Warsaw")
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_timezone("Europe/Nowhere")
+
+
+def test_runs_without_home_assistant() -> None:
+    """Test the daemon run as a file does not import Home Assistant."""
+    script = (
+        "import runpy, sys\n"
+        "sys.argv = ['daemon', '--help']\n"
+        "try:\n"
+        f"    runpy.run_path({str(DAEMON)!r}, run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "assert 'homeassistant' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, capture_output=True)
@@ -0,0 +1,88 @@
+"""Tests running the real fetch and parsing path against the Enea stand-in server."""
+
+from datetime import datetime
+
+import pytest
+from enea_outages.models import OutageType
+from enea_server import PAGE_PLANNED, PAGE_UNPLANNED, Faults
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.enea_outages.const import DOMAIN, CONF_REGION, CONF_STREET
+
+
+async def _setup_entry(hass: HomeAssistant, region: str, street: str) -> MockConfigEntry:
+    """Set up an entry watching a street of the stand-in catalogue."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_REGION: region, CONF_STREET: street},
+        unique_id=f"{region}_{street}",
+    )
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    return config_entry
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse(hass: HomeAssistant, enea_server) -> None:
+    """Test outages served over HTTP are parsed and matched."""
+    region = "Region 01"
+    street = enea_server.catalogue.streets(region)[3]
+    config_entry = await _setup_entry(hass, region, street)
+
+    now = datetime.now()
+    for outage_type, page in ((OutageType.PLANNED, PAGE_PLANNED), (OutageType.UNPLANNED, PAGE_UNPLANNED)):
+        # Outages that already ended are evicted at ingestion
+        live = [o for o in enea_server.catalogue.outages(region, page, now) if o.end_time >= now]
+        expected = [o for o in live if street in o.description]
+        coordinator = hass.data[DOMAIN][config_entry.entry_id][outage_type]
+        assert len(coordinator.data) == len(live)
+        assert len(coordinator.outages_for([street])) == len(expected)
+        assert enea_server.requests[(region, page)] == 1
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "faults",
+    [Faults(error_rate=1.0), Faults(truncate_rate=1.0)],
+    ids=["errors", "truncated"],
+)
+async def test_injected_faults_serve_stale_data(hass: HomeAssistant, enea_server, faults: Faults) -> None:
+    """Test upstream faults keep entities on stale data and throttle requests."""
+    region = "Region 02"
+    street = enea_server.catalogue.streets(region)[0]
+    config_entry = await _setup_entry(hass, region, street)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][OutageType.UNPLANNED]
+
+    enea_server.faults = faults
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.stale
+    assert coordinator.breaker.is_open
+
+    requests = enea_server.requests[(region, PAGE_UNPLANNED)]
+    await coordinator.async_refresh()
+    assert enea_server.requests[(region, PAGE_UNPLANNED)] == requests
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_slow_responses(hass: HomeAssistant, enea_server) -> None:
+    """Test latency and dripped bodies still parse completely."""
+    enea_server.faults = Faults(latency=0.05, drip_rate=1.0, drip_chunk=128, drip_delay=0.001)
+    region = "Region 03"
+    config_entry = await _setup_entry(hass, region, enea_server.catalogue.streets(region)[0])
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][OutageType.PLANNED]
+    assert len(coordinator.data) == enea_server.catalogue.outages_per_page
+    assert not coordinator.stale
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
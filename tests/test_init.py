@@ -1,13 +1,33 @@
 """Test the Enea Outages integration setup."""
 
-from unittest.mock import patch
+import asyncio
+import threading
+import time
+import tracemalloc
+from dataclasses import replace
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
 
 import pytest
+from enea_outages.models import Outage, OutageType
 from homeassistant.config_entries import ConfigEntryState
 from homeassistant.core import HomeAssistant
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
 
-from custom_components.enea_outages.const import DOMAIN, CONF_REGION
+from custom_components.enea_outages.cache import CachedFetchError, SharedFetchCache
+from custom_components.enea_outages.const import (
+    DOMAIN,
+    CONF_REGION,
+    DEFAULT_PLANNED_SCAN_INTERVAL,
+    DEFAULT_PROFILE_DEADLINE_SLACK,
+    DEFAULT_RELEASE_GRACE_PERIOD,
+    DEFAULT_STATE_WRITE_WINDOW,
+)
+from custom_components.enea_outages.coordinator import async_get_registry
+from custom_components.enea_outages.executor import async_get_executor
 
 
 @pytest.fixture
@@ -43,3 +63,455 @@ async def test_setup_and_unload_entry(hass: HomeAssistant, mock_enea_client_get_
 
     assert config_entry.state == ConfigEntryState.NOT_LOADED
     assert not hass.data[DOMAIN]  # Ensure all data is cleaned up
+
+
+@pytest.mark.asyncio
+async def test_setup_retries_when_first_fetch_fails(hass: HomeAssistant, mock_enea_client_get_outages) -> None:
+    """Test a failing first fetch retries the entry setup without keeping the coordinator, until a fetch succeeds."""
+    mock_enea_client_get_outages.side_effect = ConnectionError("Enea is down")
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_REGION: "Poznań", "street": "Testowa"},
+        entry_id="test-entry",
+        unique_id="Poznań_Testowa",
+    )
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert config_entry.state == ConfigEntryState.SETUP_RETRY
+    assert not async_get_registry(hass).coordinators
+
+    # A second failed attempt opens the region circuit, which must not hold back later retries
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=15))
+    await hass.async_block_till_done()
+    assert config_entry.state == ConfigEntryState.SETUP_RETRY
+    calls = mock_enea_client_get_outages.call_count
+
+    mock_enea_client_get_outages.side_effect = None
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=60))
+    await hass.async_block_till_done()
+    assert mock_enea_client_get_outages.call_count > calls
+    assert config_entry.state == ConfigEntryState.LOADED
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_serves_stale_data(hass: HomeAssistant, mock_enea_client_get_outages) -> None:
+    """Test entities keep the last good data while the region circuit is open."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_REGION: "Poznań", "street": "Testowa"},
+        entry_id="test-circuit",
+        unique_id="Poznań_Testowa",
+    )
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][OutageType.UNPLANNED]
+    mock_enea_client_get_outages.side_effect = Exception("Connection error")
+
+    # Two consecutive failures open the circuit, entities stay available
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=DEFAULT_STATE_WRITE_WINDOW))
+    await hass.async_block_till_done()
+    assert coordinator.breaker.is_open
+    state = hass.states.get("sensor.enea_outages_poznan_testowa_unplanned_outages_count")
+    assert state.state == "0"
+    assert state.attributes["stale"] is True
+    assert state.attributes["data_age"] is not None
+
+    # While open, no request goes upstream until the next probe is due
+    calls = mock_enea_client_get_outages.call_count
+    await coordinator.async_refresh()
+    assert mock_enea_client_get_outages.call_count == calls
+
+    # A successful probe closes the circuit
+    mock_enea_client_get_outages.side_effect = None
+    with patch("custom_components.enea_outages.circuit.time.monotonic", return_value=time.monotonic() + 3600):
+        await coordinator.async_refresh()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=DEFAULT_STATE_WRITE_WINDOW))
+    await hass.async_block_till_done()
+    assert not coordinator.breaker.is_open
+    state = hass.states.get("sensor.enea_outages_poznan_testowa_unplanned_outages_count")
+    assert state.attributes["stale"] is False
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_profile_service_writes_report(hass: HomeAssistant, mock_enea_client_get_outages, tmp_path) -> None:
+    """Test the profile service reports on the next update cycles."""
+    hass.config.config_dir = str(tmp_path)
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_REGION: "Poznań", "street": "Testowa"},
+        entry_id="test-profile",
+        unique_id="Poznań_Testowa",
+    )
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(DOMAIN, "profile", {"cycles": 1, "budget_ms": 0}, blocking=True)
+    for coordinator in hass.data[DOMAIN][config_entry.entry_id].values():
+        assert coordinator.profiler is not None
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    reports = list(tmp_path.glob("enea_outages_profile_*.txt"))
+    assert len(reports) == 1
+    report = reports[0].read_text(encoding="utf-8")
+    assert "fetch" in report
+    # Entities render in the batched state writes, which are profiled too
+    assert "state writes" in report
+    assert "async_write_ha_state" in report
+    # With a zero budget every getter is flagged
+    assert "sensor.enea_outages_poznan_testowa_planned_outages_count.native_value" in report
+    assert "binary_sensor.enea_outages_poznan_testowa_outage_active.is_on" in report
+    for coordinator in hass.data[DOMAIN][config_entry.entry_id].values():
+        assert coordinator.profiler is None
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_profile_concurrent_fetches(hass: HomeAssistant, mock_enea_client_get_outages, tmp_path) -> None:
+    """Test profiling both coordinators of a region while their fetches overlap."""
+    hass.config.config_dir = str(tmp_path)
+
+    def _slow_fetch(self, region, outage_type):
+        time.sleep(0.2)
+        return []
+
+    mock_enea_client_get_outages.side_effect = _slow_fetch
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_REGION: "Poznań", "street": "Testowa"},
+        entry_id="test-profile-concurrent",
+        unique_id="Poznań_Testowa",
+    )
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(DOMAIN, "profile", {"cycles": 1}, blocking=True)
+    coordinators = list(hass.data[DOMAIN][config_entry.entry_id].values())
+    profiler = coordinators[0].profiler
+    await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+    await hass.async_block_till_done()
+
+    # Only one profile may be active at a time, the overlapping fetch runs unprofiled instead of failing
+    for coordinator in coordinators:
+        assert coordinator.last_update_success
+        assert not coordinator.stale
+        assert coordinator.breaker.failures == 0
+    assert profiler.unprofiled >= 1
+    assert len(list(tmp_path.glob("enea_outages_profile_*.txt"))) == 1
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_profile_ends_without_cycles(hass: HomeAssistant, mock_enea_client_get_outages, tmp_path) -> None:
+    """Test one profile runs at a time and ends when its coordinators shut down or at its deadline."""
+    hass.config.config_dir = str(tmp_path)
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_REGION: "Poznań", "street": "Testowa"},
+        entry_id="test-profile-end",
+        unique_id="Poznań_Testowa",
+    )
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    tracing = tracemalloc.is_tracing()
+
+    # A second profile would detach the first one, which would then never report
+    await hass.services.async_call(DOMAIN, "profile", {"cycles": 5}, blocking=True)
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(DOMAIN, "profile", {"cycles": 1}, blocking=True)
+
+    # The deadline reports what was measured
+    async_fire_time_changed(
+        hass,
+        dt_util.utcnow() + timedelta(seconds=5 * DEFAULT_PLANNED_SCAN_INTERVAL + DEFAULT_PROFILE_DEADLINE_SLACK + 1),
+    )
+    await hass.async_block_till_done()
+    reports = list(tmp_path.glob("enea_outages_profile_*.txt"))
+    assert len(reports) == 1
+    assert "Finished at the deadline" in reports[0].read_text(encoding="utf-8")
+    assert tracemalloc.is_tracing() == tracing
+    for report in reports:
+        report.unlink()
+
+    # Coordinators released mid-profile finish it when they shut down
+    await hass.services.async_call(DOMAIN, "profile", {"cycles": 1}, blocking=True)
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=DEFAULT_RELEASE_GRACE_PERIOD + 1))
+    await hass.async_block_till_done()
+    assert not async_get_registry(hass).coordinators
+    assert len(list(tmp_path.glob("enea_outages_profile_*.txt"))) == 1
+    assert tracemalloc.is_tracing() == tracing
+
+
+@pytest.mark.asyncio
+async def test_reload_reuses_warm_coordinators(hass: HomeAssistant, mock_enea_client_get_outages) -> None:
+    """Test reloading an entry reuses the live coordinators until the grace period ends."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_REGION: "Poznań", "street": "Testowa"},
+        entry_id="test-reload",
+        unique_id="Poznań_Testowa",
+    )
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinators = dict(hass.data[DOMAIN][config_entry.entry_id])
+    calls = mock_enea_client_get_outages.call_count
+
+    assert await hass.config_entries.async_reload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert config_entry.state == ConfigEntryState.LOADED
+    assert hass.data[DOMAIN][config_entry.entry_id] == coordinators
+    assert mock_enea_client_get_outages.call_count == calls
+
+    # Once unloaded, the coordinators are only dropped after the grace period
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    registry = async_get_registry(hass)
+    assert registry.get("Poznań", OutageType.PLANNED) is coordinators[OutageType.PLANNED]
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=DEFAULT_RELEASE_GRACE_PERIOD + 1))
+    await hass.async_block_till_done()
+    assert not registry.coordinators
+
+
+@pytest.mark.asyncio
+async def test_shared_coordinators_outlive_first_entry(hass: HomeAssistant, mock_enea_client_get_outages) -> None:
+    """Test unloading the entry that created the coordinators keeps them polling for others."""
+    entries = []
+    for street in ("Testowa", "Inna"):
+        config_entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_REGION: "Poznań", "street": street},
+            unique_id=f"Poznań_{street}",
+        )
+        config_entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(config_entry.entry_id)
+        entries.append(config_entry)
+    await hass.async_block_till_done()
+    assert mock_enea_client_get_outages.call_count == 2
+
+    coordinator = hass.data[DOMAIN][entries[1].entry_id][OutageType.UNPLANNED]
+    assert await hass.config_entries.async_unload(entries[0].entry_id)
+    await hass.async_block_till_done()
+
+    calls = mock_enea_client_get_outages.call_count
+    async_fire_time_changed(hass, dt_util.utcnow() + coordinator.update_interval + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert mock_enea_client_get_outages.call_count > calls
+
+    assert await hass.config_entries.async_unload(entries[1].entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_websocket_subscribe(hass: HomeAssistant, hass_ws_client, mock_enea_client_get_outages) -> None:
+    """Test the websocket subscription sends a snapshot followed by keyed deltas."""
+    first = Outage(region="Poznań", description="ul. Testowa 1", start_time=datetime(2030, 1, 1, 8), end_time=None)
+    other = Outage(region="Poznań", description="ul. Inna 2", start_time=datetime(2030, 1, 1, 9), end_time=None)
+    mock_enea_client_get_outages.return_value = [first, other]
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_REGION: "Poznań", "street": "Testowa"},
+        entry_id="test-websocket",
+        unique_id="Poznań_Testowa",
+    )
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 1, "type": f"{DOMAIN}/subscribe", "entry_id": "test-websocket"})
+    assert (await client.receive_json())["success"]
+    snapshot = (await client.receive_json())["event"]["snapshot"]
+    # Both coordinators return the same outage, keyed apart by outage type
+    assert len(snapshot) == 2
+    assert {outage["description"] for outage in snapshot.values()} == {"ul. Testowa 1"}
+
+    # Moving the end of an outage is a change, an outage no longer listed is removed
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][OutageType.UNPLANNED]
+    coordinator.async_set_updated_data([replace(first, end_time=datetime(2030, 1, 1, 18))])
+    event = (await client.receive_json())["event"]
+    assert event["added"] == {} and event["removed"] == []
+    [(key, outage)] = event["changed"].items()
+    assert outage["end_time"] == "2030-01-01T18:00:00"
+    assert outage["outage_type"] == "unplanned"
+    coordinator.async_set_updated_data([])
+    event = (await client.receive_json())["event"]
+    assert event["removed"] == [key]
+
+    await client.send_json({"id": 2, "type": f"{DOMAIN}/subscribe", "region": "Gniezno"})
+    assert not (await client.receive_json())["success"]
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_fetch_executor_sheds_load(hass: HomeAssistant, mock_enea_client_get_outages) -> None:
+    """Test a full fetch queue sheds updates to stale data without tripping the circuit."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_REGION: "Poznań", "street": "Testowa"},
+        entry_id="test-executor",
+        unique_id="Poznań_Testowa",
+    )
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    executor = async_get_executor(hass)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][OutageType.UNPLANNED]
+    release = threading.Event()
+    executor.max_queue = 0
+    blockers = [hass.async_create_task(executor.async_run(release.wait)) for _ in range(executor.max_workers)]
+    await asyncio.sleep(0)
+
+    await coordinator.async_refresh()
+    assert coordinator.stale
+    assert not coordinator.breaker.is_open
+    assert executor.metrics["shed"] == 1
+
+    release.set()
+    await asyncio.gather(*blockers)
+    await coordinator.async_refresh()
+    assert not coordinator.stale
+    assert executor.metrics["queue_depth"] == 0
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_fetch_executor_shutdown_does_not_wait(hass: HomeAssistant) -> None:
+    """Test shutting the pool down neither waits for stuck fetches nor cancels jobs in flight when told not to."""
+    executor = async_get_executor(hass)
+    release = threading.Event()
+    stuck = hass.async_create_task(executor.async_run(release.wait, 5))
+    queued = [hass.async_create_task(executor.async_run(lambda: "regions")) for _ in range(executor.max_workers)]
+    await asyncio.sleep(0.05)
+
+    # Returns while the first fetch is still stuck, the jobs queued behind it still run
+    executor.async_shutdown(cancel_jobs=False)
+    assert not stuck.done()
+    release.set()
+    assert await stuck
+    assert await asyncio.gather(*queued) == ["regions"] * executor.max_workers
+
+    # Stopping Home Assistant cancels what is still queued
+    release.clear()
+    stuck = [hass.async_create_task(executor.async_run(release.wait, 5)) for _ in range(executor.max_workers)]
+    queued = hass.async_create_task(executor.async_run(lambda: "regions"))
+    await asyncio.sleep(0.05)
+    executor.async_shutdown()
+    release.set()
+    assert all(await asyncio.gather(*stuck))
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_fetches_once(hass: HomeAssistant, tmp_path) -> None:
+    """Test instances sharing a cache directory fetch a region once per interval between them."""
+    outages = [Outage(region="Poznań", description="ul. Testowa 1", start_time=datetime(2030, 1, 1, 8), end_time=None)]
+    fetch = AsyncMock(return_value=outages)
+    first = SharedFetchCache(hass, str(tmp_path))
+    second = SharedFetchCache(hass, str(tmp_path))
+    interval = timedelta(minutes=10)
+
+    results = await asyncio.gather(
+        first.async_fetch("Poznań", OutageType.UNPLANNED, interval, fetch),
+        second.async_fetch("Poznań", OutageType.UNPLANNED, interval, fetch),
+    )
+    assert results == [outages, outages]
+    assert fetch.await_count == 1
+
+    # A failed fetch is shared too, so the others do not retry upstream
+    failing = AsyncMock(side_effect=Exception("Connection error"))
+    with pytest.raises(Exception, match="Connection error"):
+        await first.async_fetch("Poznań", OutageType.PLANNED, interval, failing)
+    with pytest.raises(CachedFetchError):
+        await second.async_fetch("Poznań", OutageType.PLANNED, interval, failing)
+    assert failing.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_entry_reads_shared_cache(hass: HomeAssistant, tmp_path, mock_enea_client_get_outages) -> None:
+    """Test an entry uses the snapshot another instance wrote instead of fetching."""
+    outages = [Outage(region="Poznań", description="ul. Testowa 1", start_time=datetime(2030, 1, 1, 8), end_time=None)]
+    other_instance = SharedFetchCache(hass, str(tmp_path))
+    for outage_type in (OutageType.PLANNED, OutageType.UNPLANNED):
+        await other_instance.async_fetch("Poznań", outage_type, timedelta(hours=1), AsyncMock(return_value=outages))
+
+    assert await async_setup_component(hass, DOMAIN, {DOMAIN: {"cache_dir": str(tmp_path)}})
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_REGION: "Poznań", "street": "Testowa"},
+        unique_id="Poznań_Testowa",
+    )
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert mock_enea_client_get_outages.call_count == 0
+    state = hass.states.get("sensor.enea_outages_poznan_testowa_unplanned_outages_count")
+    assert state.state == "1"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_import_locations(hass: HomeAssistant, mock_enea_client_get_outages) -> None:
+    """Test locations in configuration.yaml are checked against one catalogue fetch and share first refreshes."""
+    MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_REGION: "Poznań", "street": "Testowa"},
+        unique_id="Poznań_Testowa",
+    ).add_to_hass(hass)
+    locations = [
+        {"region": "Poznań", "street": "Testowa"},
+        {"region": "Poznań", "street": "Inna"},
+        {"region": "Szczecin"},
+        {"region": "Poznań", "street": "Wojska Polskiego"},
+        {"region": "Atlantyda", "street": "Główna"},
+    ]
+    with patch("custom_components.enea_outages.provisioning.EneaOutagesClient") as mock_client_class:
+        mock_client_class.return_value.get_available_regions.return_value = ["Poznań", "Szczecin"]
+        assert await async_setup_component(hass, DOMAIN, {DOMAIN: {"locations": locations}})
+        await hass.async_block_till_done()
+
+    assert mock_client_class.return_value.get_available_regions.call_count == 1
+    entries = hass.config_entries.async_entries(DOMAIN)
+    assert sorted(entry.unique_id for entry in entries) == [
+        "Poznań_Inna",
+        "Poznań_Testowa",
+        "Poznań_Wojska_Polskiego",
+        "Szczecin",
+    ]
+    # One first refresh per region and outage type, shared by the entries of the region
+    assert mock_enea_client_get_outages.call_count == 4
+
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -1,15 +1,39 @@
 """Tests for the Enea Outages sensors."""
 
-from datetime import datetime
-from unittest.mock import patch
+import json
+from datetime import datetime, timedelta
+from unittest.mock import PropertyMock, patch
 
 import pytest
 from homeassistant.core import HomeAssistant
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
 
-from custom_components.enea_outages.const import DOMAIN, CONF_REGION, CONF_STREET
+from custom_components.enea_outages.const import (
+    DOMAIN,
+    CONF_ADDRESS_ENTITIES,
+    CONF_PROXIMITY,
+    CONF_RADIUS,
+    CONF_REGION,
+    CONF_REGION_ENTITIES,
+    CONF_STREET,
+    CONF_STREETS,
+    DEFAULT_STATE_WRITE_WINDOW,
+)
+from custom_components.enea_outages.binary_sensor import EneaOutagesActiveBinarySensor
+from custom_components.enea_outages.fanout import async_get_state_writer
 from enea_outages.models import Outage
 
+# Fixture outages are dated relative to now, so they are neither expired nor evicted
+TOMORROW = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+
+async def _async_flush_state_writes(hass: HomeAssistant) -> None:
+    """Let the state write window pass, so the coalesced writes happen."""
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=DEFAULT_STATE_WRITE_WINDOW))
+    await hass.async_block_till_done()
+
 
 @pytest.fixture
 def mock_get_outages_for_region():
@@ -22,20 +46,20 @@ def mock_get_outages_for_region():
                 Outage(
                     region="Poznań",
                     description="Planned outage street Testowa 1",
-                    start_time=datetime(2025, 12, 1, 8, 0),
-                    end_time=datetime(2025, 12, 1, 16, 0),
+                    start_time=TOMORROW + timedelta(hours=8),
+                    end_time=TOMORROW + timedelta(hours=16),
                 ),
                 Outage(
                     region="Poznań",
                     description="Planned outage street Testowa 2",
-                    start_time=datetime(2025, 12, 2, 8, 0),
-                    end_time=datetime(2025, 12, 2, 16, 0),
+                    start_time=TOMORROW + timedelta(days=1, hours=8),
+                    end_time=TOMORROW + timedelta(days=1, hours=16),
                 ),
                 Outage(
                     region="Poznań",
                     description="Planned outage street Inna 1",
-                    start_time=datetime(2025, 12, 1, 9, 0),
-                    end_time=datetime(2025, 12, 1, 17, 0),
+                    start_time=TOMORROW + timedelta(hours=9),
+                    end_time=TOMORROW + timedelta(hours=17),
                 ),
             ],
             # Unplanned outages
@@ -44,13 +68,13 @@ def mock_get_outages_for_region():
                     region="Poznań",
                     description="Unplanned outage street Testowa 1",
                     start_time=None,
-                    end_time=datetime(2025, 12, 1, 14, 0),
+                    end_time=TOMORROW + timedelta(hours=14),
                 ),
                 Outage(
                     region="Poznań",
                     description="Unplanned outage street Inna 1",
                     start_time=None,
-                    end_time=datetime(2025, 12, 1, 15, 0),
+                    end_time=TOMORROW + timedelta(hours=15),
                 ),
             ],
         ]
@@ -84,13 +108,19 @@ async def test_sensors_no_street(hass: HomeAssistant, mock_get_outages_for_regio
 
     # Planned Summary Sensor
     planned_summary_sensor = hass.states.get("sensor.enea_outages_poznan_planned_outages_summary")
-    assert planned_summary_sensor.state == "Od: 2025-12-01 08:00 do: 16:00 (Planned outage street Testowa 1)"
+    assert (
+        planned_summary_sensor.state
+        == f"Od: {TOMORROW + timedelta(hours=8):%Y-%m-%d %H:%M} do: 16:00 (Planned outage street Testowa 1)"
+    )
     assert "outages" in planned_summary_sensor.attributes
     assert len(planned_summary_sensor.attributes["outages"]) == 3  # All 3 planned outages
 
     # Unplanned Summary Sensor
     unplanned_summary_sensor = hass.states.get("sensor.enea_outages_poznan_unplanned_outages_summary")
-    assert unplanned_summary_sensor.state == "Do: 2025-12-01 14:00 (Unplanned outage street Testowa 1)"
+    assert (
+        unplanned_summary_sensor.state
+        == f"Do: {TOMORROW + timedelta(hours=14):%Y-%m-%d %H:%M} (Unplanned outage street Testowa 1)"
+    )
     assert "outages" in unplanned_summary_sensor.attributes
     assert len(unplanned_summary_sensor.attributes["outages"]) == 2  # All 2 unplanned outages
 
@@ -122,13 +152,19 @@ async def test_sensors_with_street(hass: HomeAssistant, mock_get_outages_for_reg
 
     # Planned Summary Sensor
     planned_summary_sensor = hass.states.get("sensor.enea_outages_poznan_testowa_planned_outages_summary")
-    assert planned_summary_sensor.state == "Od: 2025-12-01 08:00 do: 16:00 (Planned outage street Testowa 1)"
+    assert (
+        planned_summary_sensor.state
+        == f"Od: {TOMORROW + timedelta(hours=8):%Y-%m-%d %H:%M} do: 16:00 (Planned outage street Testowa 1)"
+    )
     assert "outages" in planned_summary_sensor.attributes
     assert len(planned_summary_sensor.attributes["outages"]) == 2
 
     # Unplanned Summary Sensor
     unplanned_summary_sensor = hass.states.get("sensor.enea_outages_poznan_testowa_unplanned_outages_summary")
-    assert unplanned_summary_sensor.state == "Do: 2025-12-01 14:00 (Unplanned outage street Testowa 1)"
+    assert (
+        unplanned_summary_sensor.state
+        == f"Do: {TOMORROW + timedelta(hours=14):%Y-%m-%d %H:%M} (Unplanned outage street Testowa 1)"
+    )
     assert "outages" in unplanned_summary_sensor.attributes
     assert len(unplanned_summary_sensor.attributes["outages"]) == 1
 
@@ -173,3 +209,322 @@ async def test_sensors_no_outages(hass: HomeAssistant) -> None:
         assert unplanned_summary_sensor.state == "Brak"
         assert "outages" in unplanned_summary_sensor.attributes
         assert len(unplanned_summary_sensor.attributes["outages"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_sensors_multiple_addresses(hass: HomeAssistant, mock_get_outages_for_region) -> None:
+    """Test an entry watching several addresses with per-address entities."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Poznań",
+        data={CONF_REGION: "Poznań", CONF_STREET: ""},
+        options={CONF_STREETS: ["Testowa 2", "Inna", "Brakujaca"], CONF_ADDRESS_ENTITIES: True},
+        entry_id="test-multi",
+        unique_id="Poznań_multi",
+    )
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    # Entry sensors use the union of all addresses, without duplicates, on a device named after the entry
+    planned_count_sensor = hass.states.get("sensor.enea_outages_poznan_planned_outages_count")
+    assert planned_count_sensor.state == "2"
+    unplanned_count_sensor = hass.states.get("sensor.enea_outages_poznan_unplanned_outages_count")
+    assert unplanned_count_sensor.state == "1"
+    device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, config_entry.entry_id)})
+    assert device.name == "Enea Outages (Poznań)"
+
+    # Per-address entities only exist for addresses that matched an outage
+    assert hass.states.get("sensor.enea_outages_poznan_inna_planned_outages_count").state == "1"
+    assert hass.states.get("sensor.enea_outages_poznan_testowa_2_unplanned_outages_count").state == "0"
+    assert hass.states.get("binary_sensor.enea_outages_poznan_inna_outage_active") is not None
+    assert hass.states.get("sensor.enea_outages_poznan_brakujaca_planned_outages_count") is None
+    assert hass.states.get("binary_sensor.enea_outages_poznan_brakujaca_outage_active") is None
+
+
+@pytest.mark.asyncio
+async def test_sensors_proximity(hass: HomeAssistant) -> None:
+    """Test proximity mode counts outages in localities near the home zone."""
+    hass.config.latitude, hass.config.longitude = 52.4100, 17.0700  # Swarzędz
+    outages = [
+        Outage(
+            region="Poznań",
+            description="Swarzędz ul. Poznańska 1",
+            start_time=TOMORROW + timedelta(hours=8),
+            end_time=TOMORROW + timedelta(hours=16),
+        ),
+        Outage(
+            region="Poznań",
+            description="Gniezno ul. Warszawska 2",
+            start_time=TOMORROW + timedelta(hours=9),
+            end_time=TOMORROW + timedelta(hours=17),
+        ),
+        Outage(
+            region="Poznań",
+            description="gm. Czerwonak, Koziegłowy ul. Piaskowa 3",
+            start_time=TOMORROW + timedelta(days=1, hours=9),
+            end_time=TOMORROW + timedelta(days=1, hours=17),
+        ),
+    ]
+    with patch("enea_outages.client.EneaOutagesClient.get_outages_for_region", return_value=outages):
+        config_entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_REGION: "Poznań", CONF_STREET: ""},
+            options={CONF_PROXIMITY: True, CONF_RADIUS: 10},
+            entry_id="test-proximity",
+            unique_id="Poznań_",
+        )
+        config_entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+    # Swarzędz and Czerwonak are within 10 km, Gniezno is not
+    planned_count_sensor = hass.states.get("sensor.enea_outages_poznan_planned_outages_count")
+    assert planned_count_sensor.state == "2"
+    descriptions = [outage["description"] for outage in planned_count_sensor.attributes["outages"]]
+    assert "Gniezno ul. Warszawska 2" not in descriptions
+
+
+@pytest.mark.asyncio
+async def test_sensors_proximity_streets(hass: HomeAssistant, tmp_path) -> None:
+    """Test streets from the user gazetteer place city outages apart instead of on the city centre."""
+    hass.config.config_dir = str(tmp_path)
+    (tmp_path / "enea_outages_gazetteer.json").write_text(
+        json.dumps(
+            {
+                "regions": {
+                    "Poznań": [
+                        {"name": "Głogowska", "locality": "Poznań", "lat": 52.3900, "lon": 16.8900},
+                        {"name": "Lechicka", "locality": "Poznań", "lat": 52.4400, "lon": 16.9300},
+                    ]
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+    # The city centre is within the radius, Lechicka is not
+    hass.config.latitude, hass.config.longitude = 52.3920, 16.8920
+    outages = [
+        Outage(
+            region="Poznań",
+            description="Poznań ul. Głogowska 10",
+            start_time=TOMORROW + timedelta(hours=8),
+            end_time=TOMORROW + timedelta(hours=16),
+        ),
+        Outage(
+            region="Poznań",
+            description="Poznań ul. Lechicka 5",
+            start_time=TOMORROW + timedelta(hours=9),
+            end_time=TOMORROW + timedelta(hours=17),
+        ),
+    ]
+    with patch("enea_outages.client.EneaOutagesClient.get_outages_for_region", return_value=outages):
+        config_entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_REGION: "Poznań", CONF_STREET: ""},
+            options={CONF_PROXIMITY: True, CONF_RADIUS: 3.5},
+            entry_id="test-proximity-streets",
+            unique_id="Poznań_",
+        )
+        config_entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+    planned_count_sensor = hass.states.get("sensor.enea_outages_poznan_planned_outages_count")
+    assert [outage["description"] for outage in planned_count_sensor.attributes["outages"]] == [
+        "Poznań ul. Głogowska 10"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_state_writes_coalesced(hass: HomeAssistant) -> None:
+    """Test an entity dirtied by both coordinators in one tick is written once."""
+    with patch("enea_outages.client.EneaOutagesClient.get_outages_for_region", return_value=[]):
+        config_entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_REGION: "Poznań", CONF_STREET: "Testowa"},
+            entry_id="test-coalesce",
+            unique_id="Poznań_Testowa",
+        )
+        config_entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+        writer = async_get_state_writer(hass)
+        writer.batch_size = 1
+        writes_before = writer.writes
+
+        coordinators = hass.data[DOMAIN][config_entry.entry_id].values()
+        for coordinator in coordinators:
+            coordinator.async_set_updated_data([])
+        await _async_flush_state_writes(hass)
+
+    # Four sensors plus the binary sensor listening to both coordinators, one write each
+    assert writer.writes - writes_before == 5
+
+
+@pytest.mark.asyncio
+async def test_state_writes_survive_failing_entity(hass: HomeAssistant) -> None:
+    """Test an entity failing to render neither blocks its batch nor later writes."""
+    with patch("enea_outages.client.EneaOutagesClient.get_outages_for_region", return_value=[]):
+        config_entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_REGION: "Poznań", CONF_STREET: "Testowa"},
+            entry_id="test-failing-entity",
+            unique_id="Poznań_Testowa",
+        )
+        config_entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+        writer = async_get_state_writer(hass)
+        coordinators = hass.data[DOMAIN][config_entry.entry_id].values()
+        with patch(
+            "custom_components.enea_outages.sensor.EneaOutagesSummarySensor.extra_state_attributes",
+            new_callable=PropertyMock,
+            side_effect=ValueError("Bad attribute"),
+        ):
+            writes_before = writer.writes
+            for coordinator in coordinators:
+                coordinator.async_set_updated_data([])
+            await _async_flush_state_writes(hass)
+        # The two summary sensors failed, the rest of the batch was written
+        assert writer.writes - writes_before == 3
+
+        writes_before = writer.writes
+        for coordinator in coordinators:
+            coordinator.async_set_updated_data([])
+        await _async_flush_state_writes(hass)
+        assert writer.writes - writes_before == 5
+
+
+@pytest.mark.asyncio
+async def test_update_service_writes_active_sensor_once(hass: HomeAssistant) -> None:
+    """Test the binary sensor is written once when both coordinators refresh back to back."""
+    with patch("enea_outages.client.EneaOutagesClient.get_outages_for_region", return_value=[]):
+        config_entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_REGION: "Poznań", CONF_STREET: "Testowa"},
+            entry_id="test-update-once",
+            unique_id="Poznań_Testowa",
+        )
+        config_entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+        original = EneaOutagesActiveBinarySensor.async_write_ha_state
+        with patch.object(
+            EneaOutagesActiveBinarySensor, "async_write_ha_state", autospec=True, side_effect=original
+        ) as write:
+            # The planned refresh completes before the unplanned one starts
+            await hass.services.async_call(DOMAIN, "update", blocking=True)
+            await _async_flush_state_writes(hass)
+        assert write.call_count == 1
+
+        assert await hass.config_entries.async_unload(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_region_sensors(hass: HomeAssistant) -> None:
+    """Test region sensors are hosted once per region and move to another entry on unload."""
+    now = datetime.now().replace(second=0, microsecond=0)
+    outages = [
+        Outage(
+            region="Poznań",
+            description="Poznań ul. Testowa 1, ul. Inna 2",
+            start_time=now + timedelta(hours=2),
+            end_time=now + timedelta(hours=6),
+        ),
+        Outage(
+            region="Poznań",
+            description="Swarzędz ul. Testowa 5",
+            start_time=now + timedelta(hours=1),
+            end_time=now + timedelta(hours=3),
+        ),
+    ]
+    entries = [
+        MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_REGION: "Poznań", CONF_STREET: street},
+            options={CONF_REGION_ENTITIES: True},
+            entry_id=f"test-region-{street}",
+            unique_id=f"Poznań_{street}",
+        )
+        for street in ("Testowa", "Inna")
+    ]
+    with patch("enea_outages.client.EneaOutagesClient.get_outages_for_region", return_value=outages):
+        for config_entry in entries:
+            config_entry.add_to_hass(hass)
+            await hass.config_entries.async_setup(config_entry.entry_id)
+            await hass.async_block_till_done()
+
+        entity_registry = er.async_get(hass)
+
+        def _state(key: str):
+            entity_id = entity_registry.async_get_entity_id("sensor", DOMAIN, f"{DOMAIN}_poznan_{key}")
+            return hass.states.get(entity_id)
+
+        # One set of region sensors, hosted by the first entry
+        assert (
+            len([entity for entity in entity_registry.entities.values() if "_poznan_region_" in entity.unique_id]) == 6
+        )
+        assert _state("region_planned_outages_count").state == "2"
+        streets = _state("region_planned_affected_streets")
+        assert streets.state == "2"
+        assert streets.attributes["streets"] == ["Inna", "Testowa"]
+        # Outage times are local, timestamp states are in UTC
+        next_start = datetime.fromisoformat(_state("region_next_planned_start").state)
+        assert next_start == (now + timedelta(hours=1)).replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        latest_end = datetime.fromisoformat(_state("region_latest_restoration").state)
+        assert latest_end == (now + timedelta(hours=6)).replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+
+        # The second entry takes the region sensors over when the first one unloads, without being reloaded
+        kept = hass.states.get("sensor.enea_outages_poznan_inna_planned_outages_count")
+        assert kept is not None
+        await hass.config_entries.async_unload(entries[0].entry_id)
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.enea_outages_poznan_inna_planned_outages_count") is kept
+        entity = entity_registry.async_get(
+            entity_registry.async_get_entity_id("sensor", DOMAIN, f"{DOMAIN}_poznan_region_planned_outages_count")
+        )
+        assert entity.config_entry_id == entries[1].entry_id
+        assert _state("region_planned_outages_count").state == "2"
+
+
+@pytest.mark.asyncio
+async def test_ended_outages_evicted(hass: HomeAssistant, freezer) -> None:
+    """Test outages that ended are dropped at ingestion and evicted once they end between updates."""
+    now = datetime.now().replace(second=0, microsecond=0)
+    outages = [
+        Outage(region="Poznań", description="ul. Testowa 1", start_time=None, end_time=now - timedelta(minutes=5)),
+        Outage(region="Poznań", description="ul. Testowa 2", start_time=None, end_time=now + timedelta(hours=2)),
+        Outage(region="Poznań", description="ul. Testowa 3", start_time=None, end_time=now + timedelta(minutes=5)),
+    ]
+    with patch("enea_outages.client.EneaOutagesClient.get_outages_for_region", return_value=outages):
+        config_entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_REGION: "Poznań", CONF_STREET: "Testowa"},
+            entry_id="test-evict",
+            unique_id="Poznań_Testowa",
+        )
+        config_entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+        state = hass.states.get("sensor.enea_outages_poznan_testowa_unplanned_outages_count")
+        assert state.state == "2"
+        assert [outage["description"] for outage in state.attributes["outages"]] == ["ul. Testowa 3", "ul. Testowa 2"]
+
+        # The next outage to end is evicted on a timer, before the next update
+        freezer.tick(timedelta(minutes=6))
+        async_fire_time_changed(hass, dt_util.utcnow())
+        await hass.async_block_till_done()
+        freezer.tick(timedelta(seconds=DEFAULT_STATE_WRITE_WINDOW))
+        await _async_flush_state_writes(hass)
+
+        state = hass.states.get("sensor.enea_outages_poznan_testowa_unplanned_outages_count")
+        assert state.state == "1"
+
+        assert await hass.config_entries.async_unload(config_entry.entry_id)
+        await hass.async_block_till_done()
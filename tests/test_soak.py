@@ -0,0 +1,83 @@
+"""Soak tests replaying fault scenarios against the Enea stand-in server.
+
+These run many simulated hours and are skipped unless pytest is given `--soak`.
+"""
+
+import gc
+import tracemalloc
+from datetime import timedelta
+
+import pytest
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+from scenarios import SCENARIOS
+
+from custom_components.enea_outages.const import (
+    DOMAIN,
+    CONF_REGION,
+    CONF_STREET,
+    DEFAULT_PLANNED_SCAN_INTERVAL,
+    DEFAULT_UNPLANNED_SCAN_INTERVAL,
+)
+
+ENTRIES = 200
+TICK = timedelta(minutes=5)
+MAX_MEMORY_GROWTH = 5 * 1024 * 1024
+
+
+@pytest.mark.soak
+@pytest.mark.asyncio
+@pytest.mark.parametrize("scenario_name", list(SCENARIOS))
+async def test_soak(hass: HomeAssistant, enea_server, freezer, scenario_name: str) -> None:
+    """Run 200 entries through a scenario and check availability, upstream load and memory."""
+    scenario = SCENARIOS[scenario_name]
+    catalogue = enea_server.catalogue
+    streets = [(region, street) for region in catalogue.region_names for street in catalogue.streets(region)]
+    assert len(streets) >= ENTRIES
+
+    entries = []
+    for region, street in streets[:ENTRIES]:
+        config_entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_REGION: region, CONF_STREET: street},
+            unique_id=f"{region}_{street}",
+        )
+        config_entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(config_entry.entry_id)
+        entries.append(config_entry)
+    await hass.async_block_till_done()
+
+    tracemalloc.start()
+    baseline = None
+    elapsed = timedelta()
+    while elapsed < timedelta(hours=scenario.hours):
+        enea_server.faults = scenario.faults_at(elapsed.total_seconds() / 3600)
+        freezer.tick(TICK)
+        elapsed += TICK
+        async_fire_time_changed(hass, dt_util.utcnow())
+        await hass.async_block_till_done()
+
+        # Entities never go unavailable once they have data
+        for state in hass.states.async_all("sensor"):
+            assert state.state != STATE_UNAVAILABLE, state.entity_id
+        if baseline is None and elapsed >= timedelta(hours=1):
+            # Collect first, states and events form cycles that only the collector frees
+            gc.collect()
+            baseline = tracemalloc.get_traced_memory()[0]
+
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert current - baseline < MAX_MEMORY_GROWTH
+
+    # Upstream load depends on the regions and intervals, not on the number of entries
+    hours = scenario.hours
+    for region in catalogue.region_names:
+        assert enea_server.requests[(region, "unpl")] <= hours * 3600 / DEFAULT_PLANNED_SCAN_INTERVAL + 2
+        assert 2 < enea_server.requests[(region, "awarie")] <= hours * 3600 / DEFAULT_UNPLANNED_SCAN_INTERVAL + 2
+
+    for config_entry in entries:
+        assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()